@@ -0,0 +1,164 @@
+"""
+Admin Commands
+
+Commands for checking up on the game's caches and subsystems.
+
+"""
+
+from evennia import CmdSet
+from evennia.commands.default.muxcommand import MuxCommand
+from world import lighting, mapping, movement, occupancy
+
+class CmdMassCheck(MuxCommand):
+    """
+    check cached object masses
+
+    Usage:
+      masscheck[/fix] [<obj>]
+
+    Switches:
+      fix - reset any cached masses that are wrong
+
+    Objects cache the mass of their contents. This compares the cached
+    values of an object (or everything here and in your inventory)
+    with freshly calculated ones.
+    """
+
+    key = "masscheck"
+    switch_options = ("fix",)
+    locks = "cmd:perm(Admin)"
+    help_category = "Admin"
+
+    def func(self):
+        caller = self.caller
+        fix = "fix" in self.switches
+
+        if self.args:
+            obj = caller.search(self.args)
+            if not obj:
+                return
+            objs = [obj]
+        else:
+            objs = caller.contents + caller.location.contents
+
+        errors = []
+        checked = 0
+        for obj in objs:
+            if hasattr(obj, "check_mass"):
+                errors.extend(obj.check_mass(fix=fix))
+                checked += 1
+
+        if not errors:
+            caller.msg(f"Checked {checked} objects, all cached masses are correct.")
+            return
+        string = f"|rFound {len(errors)} wrong cached masses:|n\n"
+        for obj, cached, actual in errors:
+            string += f"    {obj.name}({obj.dbref}) cached {cached:.2f}, actual {actual:.2f}\n"
+        if fix:
+            string += "The caches have been reset."
+        caller.msg(string)
+
+
+class CmdMoveStats(MuxCommand):
+    """
+    show movement scheduler stats
+
+    Usage:
+      movestats
+
+    Shows how many moves are pending in the movement scheduler, how many
+    have run and how late they ran.
+    """
+
+    key = "movestats"
+    locks = "cmd:perm(Admin)"
+    help_category = "Admin"
+
+    def func(self):
+        stats = movement.SCHEDULER.stats()
+        string = "|wMovement scheduler:|n\n"
+        string += f"    Pending moves: {stats['pending']}\n"
+        string += f"    Moves run: {stats['moves']} in {stats['batches']} batches\n"
+        string += f"    Lag: last {stats['last_lag']:.3f}s, average {stats['avg_lag']:.3f}s, max {stats['max_lag']:.3f}s"
+        self.caller.msg(string)
+
+
+class CmdHeatmap(MuxCommand):
+    """
+    show where players are
+
+    Usage:
+      heatmap [<zone>]
+
+    Without a zone, lists every zone with connected players in it and
+    how many. With a zone, lists its occupied rooms, busiest first.
+    """
+
+    key = "heatmap"
+    locks = "cmd:perm(Admin)"
+    help_category = "Admin"
+
+    def func(self):
+        caller = self.caller
+        heatmap = occupancy.heatmap()
+
+        if not self.args:
+            if not heatmap:
+                caller.msg("No players are in any zone.")
+                return
+            string = "|wOccupied zones:|n\n"
+            for zone_tag, rooms in sorted(heatmap.items(), key=lambda item: str(item[0])):
+                string += f"    {zone_tag}: {sum(rooms.values())} players in {len(rooms)} rooms\n"
+            caller.msg(string.rstrip())
+            return
+
+        zone_tag = self.args.strip()
+        rooms = heatmap.get(zone_tag)
+        if not rooms:
+            caller.msg(f"No players are in zone '{zone_tag}'.")
+            return
+        string = f"|wOccupied rooms in {zone_tag}:|n\n"
+        for room, count in sorted(rooms.items(), key=lambda item: -item[1]):
+            x, y, z = mapping.locate_room(room)[1]
+            string += f"    {count:>3} {room.name}({room.dbref}) at {x},{y},{z}\n"
+        caller.msg(string.rstrip())
+
+
+class CmdRelight(MuxCommand):
+    """
+    recount the light sources in a room
+
+    Usage:
+      relight [<room>]
+
+    Rooms keep count of the light sources in them. Use this after `lit`
+    was changed by hand with |wset|n, it forgets the cached counts of the
+    room (default: your location) and shows the fresh one.
+    """
+
+    key = "relight"
+    locks = "cmd:perm(Admin)"
+    help_category = "Admin"
+
+    def func(self):
+        caller = self.caller
+        if self.args:
+            room = caller.search(self.args, global_search=True)
+            if not room:
+                return
+        else:
+            room = caller.location
+        if not room:
+            caller.msg("You are not in a room.")
+            return
+        lighting.reset(room)
+        lit = "lit" if lighting.is_lit(room) else "not lit"
+        caller.msg(f"{room.name}({room.dbref}) recounted, it is {lit}.")
+
+
+class AdminCmdSet(CmdSet):
+    def at_cmdset_creation(self):
+        self.add(CmdMassCheck)
+        self.add(CmdMoveStats)
+        self.add(CmdHeatmap)
+        self.add(CmdRelight)
@@ -7,6 +7,7 @@ from django.conf import settings
 from evennia import CmdSet
 from evennia.utils import create, utils, search, logger, class_from_module
 from evennia.commands.default.building import ObjManipCommand
+from world import mapping
 
 COMMAND_DEFAULT_CLASS = class_from_module(settings.COMMAND_DEFAULT_CLASS)
 
@@ -92,18 +93,9 @@ class CmdCoordDig(ObjManipCommand):
         )
 
         # set new room coords based on current location
-        if location.db.x:
-            new_room.db.x = location.db.x
-        else:
-            new_room.db.x = 0
-        if location.db.y:
-            new_room.db.y = location.db.y
-        else:
-            new_room.db.y = 0
-        if location.db.z:
-            new_room.db.z = location.db.z
-        else:
-            new_room.db.z = 0
+        new_x = location.db.x or 0
+        new_y = location.db.y or 0
+        new_z = location.db.z or 0
 
         lockstring = self.new_room_lockstring.format(id=caller.id)
         new_room.locks.add(lockstring)
@@ -131,9 +123,9 @@ class CmdCoordDig(ObjManipCommand):
             else:
                 # modify room coords based on exit location
                 if to_exit["name"] in self.directions:
-                    new_room.db.x += self.directions[to_exit["name"]][0]
-                    new_room.db.y += self.directions[to_exit["name"]][1]
-                    new_room.db.z += self.directions[to_exit["name"]][2]
+                    new_x += self.directions[to_exit["name"]][0]
+                    new_y += self.directions[to_exit["name"]][1]
+                    new_z += self.directions[to_exit["name"]][2]
 
                 # Build the exit to the new room from the current one
                 typeclass = to_exit["option"]
@@ -196,8 +188,15 @@ class CmdCoordDig(ObjManipCommand):
                 )
         caller.msg("%s%s%s" % (room_string, exit_to_string, exit_back_string))
         if "copytags" in self.switches:
-            for tag in location.tags.all():
-                new_room.tags.add(tag)
+            for tag, category in location.tags.all(return_key_and_category=True):
+                new_room.tags.add(tag, category=category)
+        # coords and zone are final now, add the room to the zone index
+        if hasattr(new_room, "set_coords"):
+            new_room.set_coords(new_x, new_y, new_z)
+        else:
+            new_room.db.x = new_x
+            new_room.db.y = new_y
+            new_room.db.z = new_z
         if new_room and "teleport" in self.switches:
             caller.move_to(new_room)
 
@@ -304,8 +303,57 @@ class CmdCoordTunnel(COMMAND_DEFAULT_CLASS):
         digstring = "dig%s%s %s = %s;%s%s" % (telswitch, tagcopyswitch, roomname, exitname, exitshort, backstring)
         self.execute_cmd(digstring)
 
+class CmdMapIndex(COMMAND_DEFAULT_CLASS):
+    """
+    inspect or refresh the zone map index
+
+    Usage:
+      mapindex
+      mapindex/room [<room>]
+      mapindex/rebuild
+
+    Switches:
+      room - re-index a room (default the current one) after changing
+             its coords, zone tag, name or symbol by hand
+      rebuild - drop the whole index, zones reload on next use
+
+    The minimap reads rooms from an in-memory zone index. Rooms made
+    with dig/tunnel are indexed automatically. Without switches, shows
+    the index size and the rendered minimap cache hit/miss counters.
+    """
+
+    key = "mapindex"
+    switch_options = ("room", "rebuild")
+    locks = "cmd:perm(Builder)"
+    help_category = "Building"
+
+    def func(self):
+        caller = self.caller
+
+        if "rebuild" in self.switches:
+            mapping.rebuild_index()
+            caller.msg("Zone map index cleared. Zones will reload on next use.")
+            return
+
+        if "room" in self.switches:
+            room = caller.search(self.args) if self.args else caller.location
+            if not room:
+                return
+            mapping.update_room(room)
+            zone_tag, coords = mapping.locate_room(room)
+            caller.msg(f"Re-indexed {room.name} in zone {zone_tag} at {coords}.")
+            return
+
+        stats = mapping.index_stats()
+        cache = stats["cache"]
+        string = f"|wZone map index:|n {stats['zones']} zones, {stats['rooms']} rooms.\n"
+        string += f"|wMinimap cache:|n {cache['size']}/{cache['maxsize']} maps, "
+        string += f"{cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%} hit rate)."
+        caller.msg(string)
+
 
 class CustomBuilderCmdSet(CmdSet):
     def at_cmdset_creation(self):
         self.add(CmdCoordDig)
         self.add(CmdCoordTunnel)
+        self.add(CmdMapIndex)
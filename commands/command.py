@@ -9,7 +9,7 @@ import time
 from datetime import datetime
 
 from evennia.commands.command import Command as BaseCommand
-from evennia import default_cmds
+from evennia import default_cmds, utils
 
 class Command(BaseCommand):
     """
@@ -33,6 +33,41 @@ class Command(BaseCommand):
     """
 
     pass
+
+
+class OutputBufferMixin:
+    """
+    Mix into a command to send everything the caller is sent while
+    the command runs as one message, instead of one per `msg` call.
+    Set `buffer_output = False` on a subclass to turn it off.
+    """
+    buffer_output = True
+
+    def at_pre_cmd(self):
+        if self.buffer_output and hasattr(self.caller, "start_output_buffer"):
+            if self.caller.ndb.msg_buffer_depth:
+                # left on by a command that never got to stop it,
+                # send what it collected
+                self.caller.reset_output_buffer()
+            self.caller.start_output_buffer()
+            self._buffering_output = True
+            # if func raises, at_post_cmd isn't called, stop the buffer
+            # once the command is done either way
+            utils.delay(0, self._stop_output_buffer)
+        abort = super().at_pre_cmd()
+        if abort:
+            # at_post_cmd won't be called
+            self._stop_output_buffer()
+        return abort
+
+    def at_post_cmd(self):
+        super().at_post_cmd()
+        self._stop_output_buffer()
+
+    def _stop_output_buffer(self):
+        if getattr(self, "_buffering_output", False):
+            self._buffering_output = False
+            self.caller.stop_output_buffer()
 # -------------------------------------------------------------
 #
 # The default commands inherit from
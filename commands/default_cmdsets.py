@@ -13,7 +13,7 @@ to add/remove commands from the default lineup. You can create your
 own cmdsets by inheriting from them or directly from `evennia.CmdSet`.
 
 """
-from commands import command, social, builder, queue, movement, inventory, info
+from commands import command, social, builder, queue, movement, inventory, info, admin
 from typeclasses import rooms
 from evennia import default_cmds
 
@@ -41,6 +41,7 @@ class CharacterCmdSet(default_cmds.CharacterCmdSet):
         self.add(movement.MovementCmdSet)
         self.add(inventory.InventoryCmdSet)
         self.add(info.InfoCmdSet)
+        self.add(admin.AdminCmdSet)
 
 class AccountCmdSet(default_cmds.AccountCmdSet):
     """
@@ -8,7 +8,7 @@ Commands that display character information.
 from evennia import CmdSet, search_tag
 from evennia.utils import evtable
 from evennia.contrib import health_bar
-from commands.command import Command
+from commands.command import Command, OutputBufferMixin
 from world import mapping
 
 # helpers
@@ -25,7 +25,7 @@ def stat_bar(stat, cur_val, max_val, colors=['R', 'Y', 'G', 'G']):
     return bar
 
 
-class CmdSheet(Command):
+class CmdSheet(OutputBufferMixin, Command):
     """
     sheet
 
@@ -91,7 +91,7 @@ class CmdSheet(Command):
 
         return
 
-class CmdStatus(Command):
+class CmdStatus(OutputBufferMixin, Command):
     """
     status
 
@@ -109,17 +109,12 @@ class CmdStatus(Command):
     def func(self):
         caller = self.caller
 
-        vitals = caller.attributes.get("vitals", {})
-        health = vitals.get("health", 10)
-        health_max = vitals.get("health_max", 10)
-        thirst = vitals.get("thirst", 0)
-        hunger = vitals.get("hunger", 0)
-        sanity = vitals.get("sanity", 1000)
+        vitals = caller.vitals
         
-        caller.msg(stat_bar("Health", health, health_max))
-        caller.msg(stat_bar("Thirst", thirst, 500, colors=["C"]))
-        caller.msg(stat_bar("Hunger", hunger, 500, colors=["Y"]))
-        caller.msg(stat_bar("Sanity", sanity, 1000, colors=["M"]))
+        caller.msg(stat_bar("Health", vitals.get("health"), vitals.get_max("health")))
+        caller.msg(stat_bar("Thirst", vitals.get("thirst"), vitals.get_max("thirst"), colors=["C"]))
+        caller.msg(stat_bar("Hunger", vitals.get("hunger"), vitals.get_max("hunger"), colors=["Y"]))
+        caller.msg(stat_bar("Sanity", vitals.get("sanity"), vitals.get_max("sanity"), colors=["M"]))
 
 class CmdMap(Command):
 
@@ -7,12 +7,14 @@ Commands for manipulating the players inventory.
 
 import re
 import itertools
-from collections import Counter
 from evennia.commands.command import Command
 from evennia.commands.default.muxcommand import MuxCommand
 from evennia import CmdSet, utils
+from evennia.utils import list_to_string
 import typeclasses.rooms as rooms
-from typeclasses.clothing import single_type_count, clothing_type_count, get_worn_clothes
+from commands.command import OutputBufferMixin
+from world import transfer
+from typeclasses.clothing import get_worn_index
 from typeclasses.clothing import CLOTHING_OVERALL_LIMIT, CLOTHING_TYPE_LIMIT, WEARSTYLE_MAXLENGTH
 
 CATEGORY_PRIORITY = [
@@ -26,79 +28,166 @@ CATEGORY_PRIORITY = [
         "material",
         "misc"
         ]
+# {typeclass: "exit", "character" or "item"}
+_KIND_CACHE = {}
+
 # Helpers
-def list_items_clean(caller, show_doing_desc=False, categories=None, exclude=None):
-    items = []
-    if categories:
-        for category in categories:
-            for item in caller.contents:
-                if item.is_typeclass("typeclasses.exits.Exit", exact=False):
-                    continue
-                if item.is_typeclass("typeclasses.characters.Character", exact=False):
-                    continue
-                if item.db.category == category:
-                    items.append(item)
-
-    elif exclude:
-        for excluded in exclude:
-            for item in caller.contents:
-                if item.db.category == excluded:
-                    continue
-                if item.is_typeclass("typeclasses.exits.Exit", exact=False):
-                    continue
-                if item.is_typeclass("typeclasses.characters.Character", exact=False):
-                    continue
-                items.append(item)
-    else:
-        items = [item for item in caller.contents]
-
-    items = sorted(items, key=lambda itm: itm.name)
-    item_count = dict(Counter(item.name for item in items))
-    counted = []
-    string = ""
-    # loop_max = len(items) - 1
-    loop_max = len(item_count)
-    caller.msg_contents(loop_max)
-
-    for loop, item in enumerate(items):
-        if item.name in counted:
-            continue
+def get_count(obj):
+    """
+    How many items obj stands for, more than one for stacks.
+    """
+    return obj.get_count() if hasattr(obj, "get_count") else 1
+
+
+def get_kind(obj):
+    """
+    Classify an object as an exit, a character or an item. The result
+    is cached per typeclass so `is_typeclass` runs once per class.
+
+    Args:
+        obj (obj): the object to classify.
 
-        count = item_count[item.name]
+    Returns:
+        kind (str): "exit", "character" or "item".
+    """
+    cls = obj.__class__
+    kind = _KIND_CACHE.get(cls)
+    if kind is None:
+        if obj.is_typeclass("typeclasses.exits.Exit", exact=False):
+            kind = "exit"
+        elif obj.is_typeclass("typeclasses.characters.Character", exact=False):
+            kind = "character"
+        else:
+            kind = "item"
+        _KIND_CACHE[cls] = kind
+    return kind
+
+
+def group_items(caller, categories=None, exclude=None):
+    """
+    Group the contents of caller by name in a single pass.
+
+    Args:
+        caller (obj): the object whose contents are grouped.
+        categories (list, optional): only include items in these categories.
+        exclude (list, optional): leave out items in these categories.
+
+    Returns:
+        groups (list): (count, item) for each distinct name, sorted by
+            name. item is the first item found with that name, count
+            includes the items in stacks.
+
+    Notes:
+        Exits and characters are left out when filtering by categories
+        or exclude.
+    """
+    counts = {}
+    for item in caller.contents:
+        if categories or exclude:
+            if get_kind(item) != "item":
+                continue
+            category = item.db.category
+            if categories and category not in categories:
+                continue
+            if exclude and category in exclude:
+                continue
+        name = item.name
+        if name in counts:
+            counts[name][0] += get_count(item)
+        else:
+            counts[name] = [get_count(item), item]
+    return [tuple(counts[name]) for name in sorted(counts)]
+
+
+def format_item_groups(groups, looker, show_doing_desc=False):
+    """
+    Turn the groups from `group_items` into a sentence like
+    "a knife, 2 apples and a chair".
+
+    Args:
+        groups (list): (count, item) tuples.
+        looker (obj): who the names are shown to.
+        show_doing_desc (bool, optional): add the items' doing_prefix
+            and doing_desc, e.g. for furniture.
+
+    Returns:
+        string (str): the items as a sentence.
+    """
+    names = []
+    for count, item in groups:
         if count > 1:
-            name = item.get_numbered_name(count, caller)[1]
+            name = item.get_numbered_name(count, looker)[1]
         else:
-            name = item.get_numbered_name(count, caller)[0]
+            name = item.get_numbered_name(count, looker)[0]
 
         doing_desc = ""
-        if show_doing_desc and item.db.doing_desc:
-            doing_desc = f" {item.db.doing_desc}"
-
         prefix = ""
-        if show_doing_desc and item.db.doing_prefix:
-            prefix = f"{items.db.doing_prefix} "
+        if show_doing_desc:
+            if item.db.doing_desc:
+                doing_desc = f" {item.db.doing_desc}"
+            if item.db.doing_prefix:
+                prefix = f"{item.db.doing_prefix} "
 
-        name = f"{prefix}|w{name}|n{doing_desc}"
+        names.append(f"{prefix}|w{name}|n{doing_desc}")
+    return list_to_string(names)
 
-        if loop == 0:
-            if loop_max == 1:
-                string += f"{name}"
-            elif loop_max == 2:
-                string += f"{name} "
-            else:
-                string += f"{name}, "
-        elif loop > 0 and loop < loop_max - 1:
-            if loop < loop_max - 2:
-                string += f"{name}, "
-            else:
-                string += f"{name} "
+
+def list_items_clean(caller, show_doing_desc=False, categories=None, exclude=None):
+    groups = group_items(caller, categories=categories, exclude=exclude)
+    return format_item_groups(groups, caller, show_doing_desc=show_doing_desc)
+
+
+def group_contents(caller, for_container=False):
+    """
+    Reads the category, name, worn flag and mass of each item in
+    caller once and groups them for listing.
+
+    Args:
+        caller (obj): the object whose contents are listed.
+        for_container (bool, optional): use the container's mass reduction.
+
+    Returns:
+        groups (dict): {category: [(name, worn, count, mass, item), ...]}
+            sorted by name. Worn items get an entry each, the rest are
+            grouped by name, counting the items in stacks.
+        total_mass (float): the mass of all listed items.
+    """
+    categories = set(CATEGORY_PRIORITY)
+    reduction = caller.db.mass_reduction if for_container else None
+    entries = {}
+    grouped = {}
+    total_mass = 0
+
+    for seq, item in enumerate(caller.contents):
+        category = item.db.category or "misc"
+        if category not in categories:
+            continue
+        if for_container:
+            mass = item.get_mass_modified(reduction)
         else:
-            string += f"and {name}"
+            mass = item.get_mass()
+        total_mass += mass
+        name = item.name
 
-        counted.append(item.name)
-        loop += count
+        if item.db.worn:
+            entries.setdefault(category, []).append([name, seq, True, 1, mass, item])
+            continue
+        count = get_count(item)
+        group = grouped.get((category, name))
+        if group:
+            group[3] += count
+            group[4] += mass
+        else:
+            group = [name, seq, False, count, mass, item]
+            grouped[(category, name)] = group
+            entries.setdefault(category, []).append(group)
 
-    return string
+    groups = {}
+    for category, category_entries in entries.items():
+        category_entries.sort(key=lambda entry: (entry[0], entry[1]))
+        groups[category] = [(name, worn, count, mass, item)
+                            for name, seq, worn, count, mass, item in category_entries]
+    return groups, total_mass
 
 
 def display_contents(caller, empty_msg, carrying_msg, for_container=False):
@@ -109,51 +198,26 @@ def display_contents(caller, empty_msg, carrying_msg, for_container=False):
     else:
         string = ""
         
-        total_mass = 0
-        
         if for_container:
             string += f"|wContents of {caller.name}:|n\n\n"
 
+        groups, total_mass = group_contents(caller, for_container=for_container)
         for category in CATEGORY_PRIORITY:
-            items_by_category = [item for item in items if item.attributes.get("category", "misc") == category]
-            if not items_by_category:
+            if category not in groups:
                 continue
-
-            items_by_category = sorted(items_by_category, key=lambda itm: itm.name)
-            item_count = dict(Counter(item.name for item in items_by_category))
             string += f"|w{category.capitalize()}:|n\n"
-            counted = []
 
-            for item in items_by_category:
-                if for_container:
-                    total_mass += item.get_mass_modified(caller.db.mass_reduction)
-                    mass = item.get_mass_modified(caller.db.mass_reduction)
-                else:
-                    total_mass += item.get_mass()
-                    mass = item.get_mass()
-                # Skip if the item has already been counted and is not worn.
-                if item.name in counted and not item.db.worn:
-                    continue
-                count = item_count[item.name]
-                if item.db.worn:
+            for name, worn, count, mass, item in groups[category]:
+                if worn:
                     string += f"    {item.get_numbered_name(1, caller)[0]} |m(worn)|n |Y[{mass:.2f} lbs]|n\n"
                 else:
-                    mass = 0
-                    notworn = [itm for itm in items_by_category if itm.name == item.name and not itm.db.worn]
-                    for itm in notworn:
-                        if for_container:
-                            mass += itm.get_mass_modified(caller.db.mass_reduction)
-                        else:
-                            mass += itm.get_mass()
                     if count > 1:
                         name = item.get_numbered_name(count, caller)[1]
                     else:
                         name = item.get_numbered_name(count, caller)[0]
                     string += f"    {name} |Y[{mass:.2f} lbs]|n\n"
-                    counted.append(item.name)
         if for_container:
             capacity = caller.db.capacity
-            remaining_space = capacity - total_mass
             string += f"[|Y Total Weight:|n |M{total_mass:.2f}|n/|M{capacity:.2f}|n ]\n"
         else:
             string += f"[|Y Total Weight:|n |M{total_mass:.2f}|n ]\n"
@@ -180,16 +244,18 @@ class CmdInventory(Command):
         "check inventory"
         self.caller.msg(display_contents(self.caller, "|wYou are not carrying anything.|n", "You are carrying:"))
 
-class CmdPut(MuxCommand):
+class CmdPut(OutputBufferMixin, MuxCommand):
     """
     put
 
     Usage:
-      put <item> = <container>
+      put [<count>] <item> = <container>
       put/all <item> = <container>
       put/all = <container>
 
-    Put an item inside a container.
+    Put an item inside a container. With a count, only that
+    many are taken from a stack, or that many of the item if
+    it doesn't stack.
     """
 
     key = "put"
@@ -211,6 +277,7 @@ class CmdPut(MuxCommand):
             caller.msg(f"Put {self.lhs} in what?")
             return
 
+        count, self.lhs = transfer.parse_count(self.lhs)
         # put/all = <container>
         if not self.lhs and "all" in self.switches and self.rhs:
             obj_list = [obj for obj in caller.contents if obj !=caller and obj.access(caller, "get")] 
@@ -237,58 +304,25 @@ class CmdPut(MuxCommand):
             caller.msg("You can't put anything in this.")
             return
 
-        for obj in obj_list:
-            if not obj:
-                return
-            if caller == obj:
-                caller.msg("You can't put yourself in a container!")
-                return
-            if container and obj == container:
-                caller.msg(f"You can't put {container.name} in itself.")
-                return
-            obj_mass = obj.get_mass_modified(container.db.mass_reduction)
-            container_free_space = container.db.capacity - container.get_contents_mass()
-
-            if obj_mass > container_free_space:
-                caller.msg(f"There is not enough room in {container.name} to fit {obj.name}")
-                return
-
-            if not obj.at_before_get(caller):
-                return
-
-            success = obj.move_to(container, quiet=True)
-
-            if not success:
-                caller.msg("This can't be put in a container.")
-            else:
-                caller.msg(f"You put |w{obj.get_numbered_name(1, caller)[0]}|n into |w{container.name}|n.")
-                caller_name = f"|w{caller.name}|n"
-                item_name = f"|w{obj.get_numbered_name(1, caller)[0]}|n"
-                container_name = f"|w{container}|n"
-                
-                rooms.dark_aware_msg(
-                    "{character} puts {item_name} into {container_name}.",
-                    location,
-                    {"{character}":caller_name, "{item_name}":item_name, "{container_name}":container_name},
-                    {"{character}":"|wSomeone|n", "{item_name}":"|wsomething|n", "{container_name}":"|wsomething else|n"},
-                    caller
-                )
-
-            if "all" not in self.switches:
-                return
+        # Only put the first item (or count of them) if all is not specified.
+        if "all" not in self.switches:
+            obj_list = transfer.select_items(obj_list, count)
+        transfer.put_items(caller, obj_list, container, count)
 
-class CmdGet(MuxCommand):
+class CmdGet(OutputBufferMixin, MuxCommand):
     """
     pick up something
 
     Usage:
-      get <item>
+      get [<count>] <item>
       get/all <item>
-      get <item> = <container>
+      get [<count>] <item> = <container>
       get/all <item> = <container>
 
     Picks up an object from your location or from a
-    container and puts it in your inventory.
+    container and puts it in your inventory. With a count,
+    only that many are taken from a stack, or that many of
+    the item if it doesn't stack.
     """
 
     key = "get"
@@ -303,8 +337,8 @@ class CmdGet(MuxCommand):
 
         caller = self.caller
         location = caller.location
-        container_msg = ""
-        container_msg_dark = ""
+        container = None
+        count, self.lhs = transfer.parse_count(self.lhs)
 
         # get
         if not self.lhs and not self.switches:
@@ -316,8 +350,6 @@ class CmdGet(MuxCommand):
                 container = caller.search(self.rhs)
                 if not container:
                     return
-                container_msg = f" from |w{container.name}|n"
-                container_msg_dark = f" from |wsomething else|n"
                 obj_list = [obj for obj in container.contents if obj !=caller and obj.access(caller, "get")]
             else:
                 obj_list = [obj for obj in location.contents if obj != caller and obj.access(caller, "get")]
@@ -327,8 +359,6 @@ class CmdGet(MuxCommand):
                 container = caller.search(self.rhs)
                 if not container:
                     return
-                container_msg = f" from |w{container.name}|n"
-                container_msg_dark = f" from |wsomething else|n"
                 obj_list = caller.search(
                     self.lhs,
                     location=container,
@@ -351,53 +381,23 @@ class CmdGet(MuxCommand):
                 caller.msg("There is nothing to get here.")
             return
 
-        for obj in obj_list:
-            if not obj:
-                return
-            if caller == obj:
-                caller.msg("You can't get yourself.")
-                return
-            if not obj.access(caller, "get"):
-                if obj.db.get_err_msg:
-                    caller.msg(obj.db.get_err_msg)
-                else:
-                    caller.msg("You can't get that.")
-                return
-
-            # calling at_before_get mothod
-            if not obj.at_before_get(caller):
-                return
-
-            success = obj.move_to(caller, quiet=True)
+        # Only get the first item (or count of them) if all is not specified.
+        if "all" not in self.switches:
+            obj_list = transfer.select_items(obj_list, count)
+        transfer.get_items(caller, obj_list, container, count)
 
-            if not success:
-                caller.msg("This can't be picked up.")
-            else:
-                caller.msg(f"You get |w{obj.get_numbered_name(1, caller)[0]}|n{container_msg}.")
-                caller_name = caller.name
-                obj_name = obj.get_numbered_name(1, caller)[0]
-                rooms.dark_aware_msg(
-                    "|w{character}|n gets |w{obj_name}|n{container_msg}.",
-                    location,
-                    {"{character}":caller_name, "{obj_name}":obj_name, "{container_msg}":container_msg},
-                    {"{character}":"Someone", "{obj_name}":"something", "{container_msg}":container_msg_dark},
-                    caller
-                        )
-                obj.at_get(caller)
-            
-            if "all" not in self.switches:
-                return
-
-class CmdDrop(MuxCommand):
+class CmdDrop(OutputBufferMixin, MuxCommand):
     """
     drop something
 
     Usage:
-      drop <obj>
+      drop [<count>] <obj>
       drop/all <obj>
 
     Lets you drop an object from your inventory into the
-    location you are currently in.
+    location you are currently in. With a count, only that
+    many are dropped from a stack, or that many of the item
+    if it doesn't stack.
     """
 
     key = "drop"
@@ -409,6 +409,7 @@ class CmdDrop(MuxCommand):
 
         caller = self.caller
         location = caller.location
+        count, self.lhs = transfer.parse_count(self.lhs)
         
         # drop
         if not self.lhs and not self.switches:
@@ -430,42 +431,10 @@ class CmdDrop(MuxCommand):
             caller.msg(f"You aren't carrying |w{self.lhs}|n.")
             return
 
-        for obj in obj_list:
-            if not obj:
-                continue
-            
-            if obj.db.worn:
-                caller.msg(f"|w{obj.name}|n is worn. |wRemove|n it before dropping.")
-                continue
-
-            # Call the object script's at_before_drop() method.
-            if not obj.at_before_drop(caller):
-                continue
-
-            success = obj.move_to(caller.location, quiet=True)
-            if not success:
-                caller.msg(f"|w{obj.name}|n couldn't be dropped.")
-            else:
-                caller.msg(f"You drop |w{obj.name}|n.")
-                caller_name = caller.name
-                obj_name = obj.get_numbered_name(1, caller)[0]
-                
-                rooms.dark_aware_msg(
-                   "|w{character}|n drops |w{obj_name}|n.",
-                   location,
-                   {"{character}":caller_name, "{obj_name}":obj_name},
-                   {"{character}":"Someone", "{obj_name}":"something"},
-                   caller
-                )
-                # if location.db.dark:
-                #     caller_name = "Someone"
-                #     obj_name = "something"
-                # caller.location.msg_contents(f"|w{caller_name}|n drops |w{obj_name}|n.", exclude=caller)
-                obj.at_drop(caller)
-
-            # Only drop the first item if all is not specified.
-            if "all" not in self.switches:
-                return
+        # Only drop the first item (or count of them) if all is not specified.
+        if "all" not in self.switches:
+            obj_list = transfer.select_items(obj_list, count)
+        transfer.drop_items(caller, obj_list, count)
 
 class CmdWear(MuxCommand):
     """
@@ -503,14 +472,15 @@ class CmdWear(MuxCommand):
             caller.msg("That's not clothes!")
             return
 
+        worn_index = get_worn_index(caller)
         # Enforce overall clothing limit.
-        if CLOTHING_OVERALL_LIMIT and len(get_worn_clothes(self.caller)) >= CLOTHING_OVERALL_LIMIT:
+        if CLOTHING_OVERALL_LIMIT and worn_index.count() >= CLOTHING_OVERALL_LIMIT:
             caller.msg("You can't wear any more clothes.")
             return
 
         # Apply individual clothing type limits.
         if clothing.db.clothing_type and not clothing.db.worn:
-            type_count = single_type_count(get_worn_clothes(caller), clothing.db.clothing_type)
+            type_count = worn_index.type_count(clothing.db.clothing_type)
             if clothing.db.clothing_type in list(CLOTHING_TYPE_LIMIT.keys()):
                 if type_count >= CLOTHING_TYPE_LIMIT[clothing.db.clothing_type]:
                     caller.msg(
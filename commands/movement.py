@@ -5,25 +5,72 @@ Commands relating to traversing the world.
 
 """
 
+import re
 import evennia
 from evennia.commands.command import Command as BaseCommand
+from evennia.commands.default.muxcommand import MuxCommand
 from evennia import CmdSet
 from evennia.utils import search
-from commands.queue import CommandQueue
-
-def handle_movement_queue(caller, key):
+from commands.queue import CommandQueue, COMMAND_QUEUE_MAX_DEPTH
+
+# short and long direction names, used to read speedwalk paths
+DIRECTIONS = {
+    "n": "north",
+    "ne": "northeast",
+    "e": "east",
+    "se": "southeast",
+    "s": "south",
+    "sw": "southwest",
+    "w": "west",
+    "nw": "northwest",
+    "u": "up",
+    "d": "down",
+}
+DIRECTIONS.update({direction: direction for direction in list(DIRECTIONS.values())})
+
+RE_SPEEDWALK_STEP = re.compile(r"^(\d*)([a-z]+)$")
+
+def get_command_queue(caller):
+    command_queue = caller.ndb.command_queue
+    if command_queue is None:
+        max_depth = caller.db.command_queue_depth or COMMAND_QUEUE_MAX_DEPTH
+        command_queue = CommandQueue(max_depth=max_depth)
+        caller.ndb.command_queue = command_queue
+    return command_queue
+
+def handle_movement_queue(caller, key, count=1):
     currently_moving = caller.ndb.currently_moving
     if currently_moving and not currently_moving.called:
-        #caller.msg(f"Queueing {key}.")
-        if not caller.ndb.command_queue:
-            caller.ndb.command_queue = CommandQueue()
-            #caller.msg("Creating command queue...")
-        caller.ndb.command_queue.append(str(key))
-        #caller.msg(caller.ndb.command_queue.queue[0])
+        if not get_command_queue(caller).append(str(key), count):
+            caller.msg("You can't queue up any more moves.")
     else:
         caller.msg("You can't go that way.")
-        if caller.ndb.command_queue:
-            caller.ndb.command_queue.queue.clear()
+        if caller.ndb.command_queue is not None:
+            caller.ndb.command_queue.clear()
+
+def parse_speedwalk(path):
+    """
+    Read a speedwalk path like "3n e;2ne" into (direction, count) steps.
+
+    Args:
+        path (str): directions separated by spaces, commas or semicolons,
+            each optionally prefixed with a number of repeats.
+
+    Returns:
+        steps (list or None): (direction, count) tuples with the long
+            direction names, or None if a direction was not understood.
+    """
+    steps = []
+    for token in re.split(r"[\s,;]+", path.strip().lower()):
+        if not token:
+            continue
+        match = RE_SPEEDWALK_STEP.match(token)
+        if not match or match.group(2) not in DIRECTIONS:
+            return None
+        count = int(match.group(1) or 1)
+        if count > 0:
+            steps.append((DIRECTIONS[match.group(2)], count))
+    return steps
 
 class BaseMovementCmd(BaseCommand):
     def func(self):
@@ -149,6 +196,55 @@ class CmdDown(BaseMovementCmd):
     aliases = "d"
     help_category = "movement"
 
+class CmdSpeedwalk(MuxCommand):
+    """
+    speedwalk
+
+    Usage:
+      speedwalk[/fast] <path>
+
+    Switches:
+      fast - walk straight stretches in one go instead of room by room
+
+    Examples:
+      speedwalk n n e
+      speedwalk 3n;2e;u
+
+    Queue up a whole path at once. Directions can be separated by
+    spaces, commas or semicolons and prefixed with a number to repeat
+    them.
+    """
+
+    key = "speedwalk"
+    aliases = ["go"]
+    switch_options = ("fast",)
+    help_category = "movement"
+
+    def func(self):
+        caller = self.caller
+        steps = parse_speedwalk(self.args) if self.args else None
+        if not steps:
+            caller.msg("Usage: speedwalk[/fast] <path>, e.g. speedwalk 3n;2e;u")
+            return
+
+        command_queue = get_command_queue(caller)
+        currently_moving = caller.ndb.currently_moving
+        if currently_moving and not currently_moving.called:
+            command_queue.collapse = "fast" in self.switches
+            queued = command_queue.extend(steps)
+        else:
+            # start walking the first step, the rest waits in the queue
+            command_queue.clear()
+            command_queue.collapse = "fast" in self.switches
+            first, count = steps[0]
+            queued = command_queue.extend([(first, count - 1)] + steps[1:]) + 1
+            caller.execute_cmd(first)
+
+        wanted = sum(count for direction, count in steps)
+        if queued < wanted:
+            caller.msg(f"You can only queue up {command_queue.max_depth} moves, "
+                       f"{wanted - queued} were left out.")
+
 class MovementCmdSet(CmdSet):
     def at_cmdset_creation(self):
         self.add(CmdNorth)
@@ -161,3 +257,4 @@ class MovementCmdSet(CmdSet):
         self.add(CmdWest)
         self.add(CmdUp)
         self.add(CmdDown)
+        self.add(CmdSpeedwalk)
@@ -5,24 +5,104 @@ Commands that have an effect on the command queue.
 
 """
 
+from collections import deque
 import evennia
 from evennia.commands.command import Command as BaseCommand
 from evennia import CmdSet
 
+# default number of commands a character can have queued, a character's
+# db.command_queue_depth overrides it
+COMMAND_QUEUE_MAX_DEPTH = 50
+
 class CommandQueue:
-    def __init__(self):
-        self.queue = []
+    """
+    Commands waiting for the current movement to finish. Consecutive
+    identical commands are stored as a single [command, count] run, so
+    a long speedwalk takes little space and can be pulled off in one go
+    with `pop_run`.
+    """
+    def __init__(self, max_depth=COMMAND_QUEUE_MAX_DEPTH, collapse=False):
+        self.queue = deque()
+        self.max_depth = max_depth
+        self.depth = 0
+        # whether runs of the same direction are walked as one traversal
+        self.collapse = collapse
+
+    def __len__(self):
+        return self.depth
+
+    def append(self, command, count=1):
+        """
+        Queue a command, possibly several times.
 
-    def append(self, command):
-        self.queue.append(command) 
+        Returns:
+            queued (int): how many were queued before hitting max_depth.
+        """
+        count = min(count, self.max_depth - self.depth)
+        if count <= 0:
+            return 0
+        if self.queue and self.queue[-1][0] == command:
+            self.queue[-1][1] += count
+        else:
+            self.queue.append([command, count])
+        self.depth += count
+        return count
+
+    def extend(self, commands):
+        """
+        Queue a list of commands or (command, count) tuples.
+
+        Returns:
+            queued (int): how many were queued before hitting max_depth.
+        """
+        queued = 0
+        for command in commands:
+            if isinstance(command, tuple):
+                queued += self.append(*command)
+            else:
+                queued += self.append(command)
+        return queued
+
+    def push_front(self, command, count=1):
+        """Put commands back at the front of the queue."""
+        if self.queue and self.queue[0][0] == command:
+            self.queue[0][1] += count
+        else:
+            self.queue.appendleft([command, count])
+        self.depth += count
 
     def call_next(self):
         if self.queue:
-            command = self.queue[0]
-            self.queue.pop(0)
-            return command
+            run = self.queue[0]
+            run[1] -= 1
+            self.depth -= 1
+            if run[1] <= 0:
+                self.queue.popleft()
+            return run[0]
         return ""
 
+    def pop_run(self, command, max_count):
+        """
+        Take up to max_count repeats of command off the front of the queue.
+
+        Returns:
+            count (int): how many were taken.
+        """
+        if not self.queue or self.queue[0][0] != command:
+            return 0
+        run = self.queue[0]
+        count = min(run[1], max_count)
+        run[1] -= count
+        self.depth -= count
+        if run[1] <= 0:
+            self.queue.popleft()
+        return count
+
+    def clear(self):
+        self.queue.clear()
+        self.depth = 0
+        self.collapse = False
+
 class CmdStop(BaseCommand):
     """
     stop action
@@ -39,7 +119,7 @@ class CmdStop(BaseCommand):
     def func(self):
         """
         This is a very simple command, using the
-        stored deferred from the exit traversal found
+        stored pending move from the exit traversal found
         in typeclasses/exits.py Exit class.
         """
         currently_moving = self.caller.ndb.currently_moving
@@ -48,8 +128,8 @@ class CmdStop(BaseCommand):
             self.caller.msg("You stop moving.")
             for observer in self.caller.location.contents_get(self.caller):
                 observer.msg("%s stops." % self.caller.get_display_name(observer))
-            if self.caller.ndb.command_queue:
-                self.caller.ndb.command_queue.queue.clear()
+            if self.caller.ndb.command_queue is not None:
+                self.caller.ndb.command_queue.clear()
         else:
             self.caller.msg("You are not moving!")
 
@@ -5,12 +5,14 @@ Commands relating to socializing.
 
 """
 
-import evennia
 from evennia.commands.command import Command as BaseCommand
 from evennia import CmdSet
 from evennia.utils import search
 import typeclasses.rooms as rm
-from typeclasses.scripts.utils import get_direction
+from world import sound
+
+# how far a yell carries, see world/sound.py
+YELL_VOLUME = 6
 
 class CmdYell(BaseCommand):
     """
@@ -19,7 +21,7 @@ class CmdYell(BaseCommand):
     Usage:
       yell <msg>
 
-    Yell a message to everyone in the same zone.
+    Yell a message that carries to nearby rooms in the same zone.
     """
     
     key = "yell"
@@ -29,25 +31,19 @@ class CmdYell(BaseCommand):
     def func(self):
         caller = self.caller
         this_room = caller.location
-        coords = (this_room.db.x, this_room.db.y, this_room.db.z)
-        tag = this_room.tags.get(category="zone")
-        rooms = evennia.search_tag(tag, category="zone")
         msg = self.args.lstrip()
+        if not msg:
+            caller.msg("Yell what?")
+            return
         caller.msg(f'You yell, "{msg}".')
-        for room in rooms:
-            if room == this_room:
-                room.msg_contents(f'{caller} yells, "{msg}".', exclude=self.caller)
-                rm.dark_aware_msg(
-                    '{caller} yells, "{msg}".',
-                    this_room,
-                    {"{caller}":caller.name, "{msg}":msg},
-                    {"{caller}":"Someone", "{msg}":msg},
-                    caller
-                )
-            else:
-                room_coords = (room.db.x, room.db.y, room.db.z)
-                dir = get_direction(coords, room_coords)
-                room.msg_contents(f'From the {dir} you hear someone yell, "{msg}".', exclude=self.caller)
+        rm.dark_aware_msg(
+            '{caller} yells, "{msg}".',
+            this_room,
+            {"{caller}":caller.name, "{msg}":msg},
+            {"{caller}":"Someone", "{msg}":msg},
+            caller
+        )
+        sound.emit_sound(this_room, f'someone yell, "{msg}"', YELL_VOLUME)
 
 class CmdPose(BaseCommand):
     """
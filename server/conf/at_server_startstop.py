@@ -22,7 +22,8 @@ def at_server_start():
     This is called every time the server starts up, regardless of
     how it was shut down.
     """
-    pass
+    from typeclasses.rooms import start_desc_prewarm
+    start_desc_prewarm()
 
 
 def at_server_stop():
@@ -30,7 +31,8 @@ def at_server_stop():
     This is called just before the server is shut down, regardless
     of it is for a reload, reset or shutdown.
     """
-    pass
+    from world import vitals
+    vitals.flush()
 
 
 def at_server_reload_start():
@@ -37,6 +37,16 @@ SERVERNAME = "Shadow Port"
 # Time factorc
 TIME_FACTOR = 8
 
+# Scripts that are always running
+GLOBAL_SCRIPTS = {
+    "vitals_regen": {
+        "typeclass": "typeclasses.scripts.scripts.VitalsRegen",
+        "interval": 30,
+        "persistent": True,
+        "desc": "Regenerate the vitals of online characters",
+    },
+}
+
 ######################################################################
 # Settings given in secret_settings.py override those in this file.
 ######################################################################
@@ -9,9 +9,11 @@ creation commands.
 """
 from evennia import DefaultCharacter
 from evennia import TICKER_HANDLER as tickerhandler
-from evennia.utils import list_to_string, search
+from evennia.utils import list_to_string, search, lazy_property
 import typeclasses.rooms as rooms
-from typeclasses.clothing import get_worn_clothes
+from world import lighting, occupancy, regen
+from world.vitals import VitalsHandler
+from typeclasses.clothing import get_worn_index
 
 
 class Character(DefaultCharacter):
@@ -34,7 +36,7 @@ class Character(DefaultCharacter):
     at_post_puppet - Echoes "AccountName has entered the game" to the room.
 
     """
-    def announce_move_from(self, destination, msg=None, mapping=None):
+    def announce_move_from(self, destination, msg=None, mapping=None, **kwargs):
         """
         Called if the move is to be announced. This is
         called while we are still standing in the old
@@ -44,6 +46,8 @@ class Character(DefaultCharacter):
             destination (Object): The place we are going to.
             msg (str, optional): a replacement message.
             mapping (dict, optional): additional mapping objects.
+            traversed_exit (Object, optional): the exit being used, passed
+                on by the exit's move_to.
 
         You can override this method and call its parent with a
         message to simply change the default message.  In the string,
@@ -54,23 +58,22 @@ class Character(DefaultCharacter):
             destination: the location of the object after moving.
 
         """
-        if self.location.db.dark: 
-            location = self.location
-            exits = [
-                o for o in location.contents if o.location is location and o.destination is destination
-            ]
-            exit_name = str(exits[0]) if exits else "somewhere"
-            rooms.dark_aware_msg(
-                "{character} leaves {exit}.",
-                self.location,
-                {"{character}":self.name, "{exit}":exit_name},
-                {"{character}":"Someone", "{exit}":exit_name},
-                self
-            )
+        location = self.location
+        if not location:
             return
-        super().announce_move_from(destination, msg="{object} leaves {exit}.")
+        the_exit = kwargs.get("traversed_exit")
+        if not the_exit and hasattr(location, "get_exit_to"):
+            the_exit = location.get_exit_to(destination)
+        exit_name = str(the_exit) if the_exit else "somewhere"
+        rooms.dark_aware_msg(
+            "{character} leaves {exit}.",
+            location,
+            {"{character}":self.name, "{exit}":exit_name},
+            {"{character}":"Someone", "{exit}":exit_name},
+            self
+        )
 
-    def announce_move_to(self, source_location, msg=None, mapping=None):
+    def announce_move_to(self, source_location, msg=None, mapping=None, **kwargs):
         """
         Called after the move if the move was not quiet. At this point
         we are standing in the new location.
@@ -91,30 +94,23 @@ class Character(DefaultCharacter):
         """
         origin = source_location
         destination = self.location
-        exits = []
-        if origin:
-            exits = [
-                o
-                for o in destination.contents
-                if o.location is destination and o.destination is origin
-            ]
-        the_exit = exits[0]
+        the_exit = None
+        if origin and hasattr(destination, "get_exit_to"):
+            the_exit = destination.get_exit_to(origin)
         exit_msg_obj = "{object}"
         exit_msg = "%s arrives from the {exit}." % (exit_msg_obj)
         exit_dict = {"up":"above", "down":"below", "in":"inside", "out":"outside"}
-        if str(the_exit) in exit_dict:
+        if not the_exit:
+            exit_msg = "%s arrives." % (exit_msg_obj)
+        elif str(the_exit) in exit_dict:
             exit_msg = "%s arrives from %s." % (exit_msg_obj, exit_dict[str(the_exit)])
-        if destination.db.dark:
-            rooms.dark_aware_msg(
-                exit_msg,
-                self.location,
-                {"{object}":self.name, "{exit}":str(the_exit)},
-                {"{object}":"Someone", "{exit}":str(the_exit)},
-                self
-            )
-            return
-
-        super().announce_move_to(source_location, msg=exit_msg)
+        rooms.dark_aware_msg(
+            exit_msg,
+            destination,
+            {"{object}":self.name, "{exit}":str(the_exit)},
+            {"{object}":"Someone", "{exit}":str(the_exit)},
+            self
+        )
 
     def return_appearance(self, looker):
         """
@@ -137,15 +133,16 @@ class Character(DefaultCharacter):
         string = "|y%s|n\n" % self.get_display_name(looker)
         desc = self.db.desc
         worn_string_list = []
-        clothes_list = get_worn_clothes(self, exclude_covered=True)
+        worn_index = get_worn_index(self)
         # Append worn, uncovered clothing to the description
-        for garment in clothes_list:
+        for garment in worn_index.get(exclude_covered=True):
+            wearstyle = worn_index.wearstyles[garment]
             # If 'worn' is True, just append the name
-            if garment.db.worn is True:
+            if wearstyle is True:
                 worn_string_list.append(garment.name)
             # Otherwise, append the name and the string value of 'worn'
-            elif garment.db.worn:
-                worn_string_list.append("%s %s" % (garment.name, garment.db.worn))
+            elif wearstyle:
+                worn_string_list.append("%s %s" % (garment.name, wearstyle))
         if desc:
             string += "%s" % desc
         # Append worn clothes.
@@ -170,6 +167,17 @@ class Character(DefaultCharacter):
         
         super().at_say(message, msg_self, msg_location, receivers, msg_receivers, **kwargs)
 
+    def at_object_receive(self, moved_obj, source_location, **kwargs):
+        super().at_object_receive(moved_obj, source_location, **kwargs)
+        lighting.at_object_receive(self, moved_obj)
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        super().at_object_leave(moved_obj, target_location, **kwargs)
+        lighting.at_object_leave(self, moved_obj)
+        # clothes that leave the inventory are no longer worn
+        if self.ndb.worn_index is not None:
+            self.ndb.worn_index.discard(moved_obj)
+
     def at_object_creation(self):
         super().at_object_creation()
         self.db.vitals = {"health":10,
@@ -178,37 +186,120 @@ class Character(DefaultCharacter):
 
     def at_post_puppet(self, **kwargs):
         super().at_post_puppet(**kwargs)
-        tickerhandler.add(30, self.on_tick)
+        regen.update(self)
+        occupancy.add_listener(self)
 
     def at_pre_unpuppet(self):
         super().at_pre_unpuppet()
-        tickerhandler.remove(30, self.on_tick)
+        regen.remove(self)
+        occupancy.remove_listener(self)
+
+    def at_post_unpuppet(self, account, session=None, **kwargs):
+        location = self.location
+        super().at_post_unpuppet(account, session=session, **kwargs)
+        if location and self.location is None:
+            # the character was taken off the grid without the move hooks,
+            # at_pre_puppet calls at_object_receive when it comes back, so
+            # the room has to hear that it left (light count and listing)
+            location.at_object_leave(self, None)
+
+    def at_after_move(self, source_location, **kwargs):
+        super().at_after_move(source_location, **kwargs)
+        occupancy.move_listener(self)
+
+    def msg(self, text=None, from_obj=None, session=None, options=None, **kwargs):
+        """
+        Messages are collected instead of sent while the output buffer
+        is on, see `start_output_buffer`. Only plain text is buffered,
+        anything else flushes the buffer and is sent as usual.
+        """
+        buffer = self.ndb.msg_buffer
+        if buffer is not None:
+            if (text is not None and not isinstance(text, tuple)
+                    and not (from_obj or session or options or kwargs)):
+                buffer.append(str(text))
+                return
+            self.flush_output()
+        super().msg(text=text, from_obj=from_obj, session=session, options=options, **kwargs)
+
+    def start_output_buffer(self):
+        """
+        Start collecting messages, so everything sent until
+        `stop_output_buffer` goes out as one message. Calls can be
+        nested, the buffer is sent when the outermost one stops.
+        """
+        self.ndb.msg_buffer_depth = (self.ndb.msg_buffer_depth or 0) + 1
+        if self.ndb.msg_buffer is None:
+            self.ndb.msg_buffer = []
+
+    def stop_output_buffer(self):
+        """
+        Stop collecting messages and send what was collected.
+        """
+        depth = (self.ndb.msg_buffer_depth or 1) - 1
+        self.ndb.msg_buffer_depth = depth
+        if depth <= 0:
+            self.flush_output()
+            self.ndb.msg_buffer = None
+
+    def reset_output_buffer(self):
+        """
+        Send what was collected and turn the output buffer off, however
+        deeply it was started.
+        """
+        self.flush_output()
+        self.ndb.msg_buffer_depth = 0
+        self.ndb.msg_buffer = None
+
+    def flush_output(self):
+        """
+        Send the collected messages as one message.
+        """
+        buffer = self.ndb.msg_buffer
+        if buffer:
+            self.ndb.msg_buffer = []
+            super().msg(text="\n".join(buffer))
+
+    @property
+    def nightvision(self):
+        """
+        Whether the character can see in the dark. The db value is
+        cached on ndb since it is checked for every message in a dark
+        room, so set it through this property.
+        """
+        nightvision = self.ndb.nightvision
+        if nightvision is None:
+            nightvision = bool(self.db.nightvision)
+            self.ndb.nightvision = nightvision
+        return nightvision
+
+    @nightvision.setter
+    def nightvision(self, value):
+        self.db.nightvision = bool(value)
+        self.ndb.nightvision = bool(value)
+
+    @lazy_property
+    def vitals(self):
+        return VitalsHandler(self)
 
     @property
     def health(self):
-        if self.db.vitals["health"] is None:
-            self.db.vitals["health"] = 10
-        return self.db.vitals["health"]
+        return self.vitals.get("health")
 
     @health.setter
     def health(self, value):
-        if value > self.health_max:
-            self.db.vitals["health"] = self.health_max
-        else:
-            self.db.vitals["health"] = value
-        if self.db.vitals["health"] <= 0:
-            self.db.vitals["health"] = 0
+        if self.vitals.set("health", value) <= 0:
             self.death()
+        regen.update(self)
 
     @property
     def health_max(self):
-        if self.db.vitals["health_max"] is None:
-            self.db.vitals["health_max"] = 10
-        return self.db.vitals["health_max"]
+        return self.vitals.get_max("health")
 
     @health_max.setter
     def health_max(self, value):
-        self.db.vitals["health"] = value
+        self.vitals.set_max("health", value)
+        regen.update(self)
 
     def full_heal(self, quiet=False):
         self.health = self.health_max
@@ -222,14 +313,19 @@ class Character(DefaultCharacter):
             msg_color = "|r"
         elif ammount > 0:
             msg_color = "|g"
-        self.msg(f"{msg_color}Health changed by {ammount}.|n")
-        self.health += ammount
-        self.msg(f"Current health: {self.health} / {self.health_max}")
+        self.start_output_buffer()
+        try:
+            self.msg(f"{msg_color}Health changed by {ammount}.|n")
+            self.health += ammount
+            self.msg(f"Current health: {self.health} / {self.health_max}")
+        finally:
+            self.stop_output_buffer()
         return
 
     def on_tick(self):
-        if self.health < self.health_max:
-            self.change_health(2)
+        # regen is run by the vitals_regen script now, drop the
+        # per-character tickers that were set up before
+        tickerhandler.remove(30, self.on_tick)
 
     def death(self):
         self.msg("|r You are have died!!")
@@ -238,6 +334,7 @@ class Character(DefaultCharacter):
             item.move_to(self.location, quiet=True)
             if item.db.worn:
                 item.db.worn = False
+                item.db.covered_by = False
 
         self.move_to(limbo[0], quiet=True)
         self.full_heal(quiet=True)
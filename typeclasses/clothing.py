@@ -43,6 +43,14 @@ CLOTHING_TYPE_CANT_COVER_WITH = ["jewelry"]
 # Helper Functions
 
 
+def _type_order(garment, clothing_type=None):
+    clothing_type = clothing_type or garment.db.clothing_type
+    try:
+        return CLOTHING_TYPE_ORDER.index(clothing_type)
+    except ValueError:
+        return len(CLOTHING_TYPE_ORDER)
+
+
 def order_clothes_list(clothes_list):
     """
     Orders a given clothes list by the order specified in CLOTHING_TYPE_ORDER.
@@ -55,20 +63,109 @@ def order_clothes_list(clothes_list):
                                     according to the heirarchy of clothing types
                                     specified in CLOTHING_TYPE_ORDER.
     """
-    ordered_clothes_list = clothes_list
-    # For each type of clothing that exists...
-    for current_type in reversed(CLOTHING_TYPE_ORDER):
-        # Check each item in the given clothes list.
-        for clothes in clothes_list:
-            # If the item has a clothing type...
-            if clothes.db.clothing_type:
-                item_type = clothes.db.clothing_type
-                # And the clothing type matches the current type...
-                if item_type == current_type:
-                    # Move it to the front of the list!
-                    ordered_clothes_list.remove(clothes)
-                    ordered_clothes_list.insert(0, clothes)
-    return ordered_clothes_list
+    # the sort is stable, so clothes of the same (or no) type keep their order
+    clothes_list.sort(key=_type_order)
+    return clothes_list
+
+
+class WornIndex:
+    """
+    Index of the clothes a character is wearing, kept on the character's
+    ndb. It is built from the inventory the first time it is needed and
+    then kept up to date by `Clothing.wear`, `Clothing.remove`,
+    `Clothing.at_get` and by the character when clothes leave its
+    inventory.
+
+    It holds the worn clothes in CLOTHING_TYPE_ORDER, how they are worn,
+    the number worn of each type and which clothes cover which.
+    """
+    def __init__(self, character):
+        # [(type order, garment)], kept sorted
+        self.worn = []
+        self.wearstyles = {}
+        self.types = {}
+        self.type_counts = {}
+        # {garment: garment covering it} and {garment: [garments it covers]}
+        self.covered_by = {}
+        self.covering = {}
+        for item in character.contents:
+            if item.db.worn:
+                self.add(item, item.db.worn)
+        for item in list(self.wearstyles):
+            coverer = item.db.covered_by
+            if coverer and coverer in self.wearstyles:
+                self.cover(item, coverer)
+
+    def add(self, garment, wearstyle):
+        if garment in self.wearstyles:
+            self.wearstyles[garment] = wearstyle
+            return
+        clothing_type = garment.db.clothing_type
+        order = _type_order(garment, clothing_type)
+        position = len(self.worn)
+        while position and self.worn[position - 1][0] > order:
+            position -= 1
+        self.worn.insert(position, (order, garment))
+        self.wearstyles[garment] = wearstyle
+        self.types[garment] = clothing_type
+        if clothing_type:
+            self.type_counts[clothing_type] = self.type_counts.get(clothing_type, 0) + 1
+
+    def discard(self, garment):
+        """Forget a garment. Returns the garments it was covering."""
+        if garment not in self.wearstyles:
+            return []
+        self.worn = [entry for entry in self.worn if entry[1] is not garment]
+        del self.wearstyles[garment]
+        clothing_type = self.types.pop(garment)
+        if clothing_type:
+            self.type_counts[clothing_type] -= 1
+        coverer = self.covered_by.pop(garment, None)
+        if coverer in self.covering:
+            self.covering[coverer].remove(garment)
+        uncovered = self.covering.pop(garment, [])
+        for item in uncovered:
+            self.covered_by.pop(item, None)
+        return uncovered
+
+    def cover(self, garment, coverer):
+        old_coverer = self.covered_by.get(garment)
+        if old_coverer in self.covering:
+            self.covering[old_coverer].remove(garment)
+        self.covered_by[garment] = coverer
+        self.covering.setdefault(coverer, []).append(garment)
+
+    def get(self, exclude_covered=False):
+        return [garment for order, garment in self.worn
+                if not (exclude_covered and garment in self.covered_by)]
+
+    def of_types(self, clothing_types):
+        return [garment for order, garment in self.worn
+                if self.types[garment] in clothing_types]
+
+    def count(self):
+        return len(self.worn)
+
+    def type_count(self, clothing_type):
+        return self.type_counts.get(clothing_type, 0)
+
+
+def get_worn_index(character):
+    """
+    Get the worn clothing index of a character, building it if needed.
+
+    Args:
+        character (obj): The character wearing the clothes.
+
+    Returns:
+        index (WornIndex): The character's worn clothing index.
+    """
+    index = character.ndb.worn_index
+    if index is None:
+        index = WornIndex(character)
+        character.ndb.worn_index = index
+    return index
+
 
 def get_worn_clothes(character, exclude_covered=False):
     """
@@ -87,16 +184,7 @@ def get_worn_clothes(character, exclude_covered=False):
                                      the CLOTHING_TYPE_ORDER option specified
                                      in this module.
     """
-    clothes_list = []
-    for item in character.contents:
-        # If uncovered or not excluding covered items
-        if not item.db.covered_by or exclude_covered is False:
-            # If 'worn' is True, add to the list
-            if item.db.worn:
-                clothes_list.append(item)
-    # Might as well put them in order here too.
-    ordered_clothes_list = order_clothes_list(clothes_list)
-    return ordered_clothes_list
+    return get_worn_index(character).get(exclude_covered=exclude_covered)
 
 def clothing_type_count(clothes_list):
     """
@@ -144,9 +232,8 @@ def single_type_count(clothes_list, type):
 
 
 class Clothing(Object):
-    def at_object_creation(self):
-        self.db.category = "clothing"
-        
+    attribute_defaults = {"category": "clothing"}
+
     def wear(self, wearer, wearstyle, quiet=False):
         """
         Sets clothes to 'worn' and optionally echoes to the room.
@@ -166,16 +253,18 @@ class Clothing(Object):
         """
         # Set clothing as worn
         self.db.worn = wearstyle
+        index = get_worn_index(wearer)
         # Auto-cover appropriate clothing types, as specified above
         to_cover = []
-        if self.db.clothing_type and self.db.clothing_type in CLOTHING_TYPE_AUTOCOVER:
-            for garment in get_worn_clothes(wearer):
-                if (
-                    garment.db.clothing_type
-                    and garment.db.clothing_type in CLOTHING_TYPE_AUTOCOVER[self.db.clothing_type]
-                ):
-                    to_cover.append(garment)
-                    garment.db.covered_by = self
+        clothing_type = self.db.clothing_type
+        if clothing_type and clothing_type in CLOTHING_TYPE_AUTOCOVER:
+            for garment in index.of_types(CLOTHING_TYPE_AUTOCOVER[clothing_type]):
+                if garment is self or index.covered_by.get(garment) is self:
+                    continue
+                to_cover.append(garment)
+                garment.db.covered_by = self
+                index.cover(garment, self)
+        index.add(self, wearstyle)
         # Return if quiet
         if quiet:
             return
@@ -215,12 +304,10 @@ class Clothing(Object):
         self_remove_message = f"|wYou|n remove |w{self.name}|n"
         uncovered_list = []
 
-        # Check to see if any other clothes are covered by this object.
-        for item in wearer.contents:
-            # If anything is covered by
-            if item.db.covered_by == self:
-                item.db.covered_by =False
-                uncovered_list.append(item.name)
+        # Uncover any other clothes covered by this object.
+        for item in get_worn_index(wearer).discard(self):
+            item.db.covered_by = False
+            uncovered_list.append(item.name)
         if len(uncovered_list) > 0:
             remove_message = "|w{wearer}|n removes |w{item_name}|n, revealing |w{uncovered_list}|n"
             self_remove_message = f"|wYou|n remove |w{self.name}|n, revealing |w{list_to_string(uncovered_list)}|n"
@@ -242,3 +329,5 @@ class Clothing(Object):
         location changed without getting removed.
         """
         self.db.worn = False
+        if getter.ndb.worn_index is not None:
+            getter.ndb.worn_index.discard(self)
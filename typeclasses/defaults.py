@@ -0,0 +1,90 @@
+"""
+Attribute defaults
+
+Typeclasses can declare default Attribute values on the class instead of
+writing them to every new object in `at_object_creation`:
+
+    class Container(AttributeDefaultsMixin, Object):
+        attribute_defaults = {"capacity": 100, "category": "container"}
+
+`obj.db.capacity` then returns 100 until a value is set on the object,
+only values that are set are saved to the database. Defaults are
+inherited and can be overridden by subclasses.
+
+Mutable defaults (lists, dicts and sets) are copied on every read, so
+the class' default can't be changed by accident. Changing the copy in
+place doesn't save it, assign the changed value to save it:
+
+    details = obj.db.details
+    details["wall"] = "A wall."
+    obj.db.details = details
+
+Note that `obj.attributes.get()` and `obj.attributes.has()` only see
+saved values, read defaults through `obj.db`.
+
+"""
+import copy
+from evennia.typeclasses.attributes import DbHolder
+
+_GA = object.__getattribute__
+_SA = object.__setattr__
+
+_MISSING = object()
+_MUTABLE = (list, dict, set)
+# {class: merged attribute defaults}
+_CLASS_DEFAULTS = {}
+
+
+def get_attribute_defaults(cls):
+    """
+    Get the attribute defaults of a typeclass, merged over its parents.
+
+    Args:
+        cls (class): the typeclass.
+
+    Returns:
+        defaults (dict): {attribute name: default value}
+    """
+    defaults = _CLASS_DEFAULTS.get(cls)
+    if defaults is None:
+        defaults = {}
+        for klass in reversed(cls.__mro__):
+            defaults.update(klass.__dict__.get("attribute_defaults", {}))
+        _CLASS_DEFAULTS[cls] = defaults
+    return defaults
+
+
+class DefaultsDbHolder(DbHolder):
+    """
+    `db` holder that falls back to the typeclass' attribute defaults.
+    """
+    def __init__(self, obj, defaults):
+        super().__init__(obj, "attributes")
+        _SA(self, "_defaults", defaults)
+
+    def __getattribute__(self, attrname):
+        if attrname == "all":
+            return DbHolder.__getattribute__(self, attrname)
+        handler = _GA(self, "attributes")
+        value = handler.get(attrname, default=_MISSING)
+        if value is _MISSING:
+            value = _GA(self, "_defaults").get(attrname)
+            if isinstance(value, _MUTABLE):
+                value = copy.deepcopy(value)
+        return value
+
+
+class AttributeDefaultsMixin:
+    """
+    Typeclass mixin for class-level attribute defaults, see the module
+    docstring.
+    """
+    attribute_defaults = {}
+
+    @property
+    def db(self):
+        try:
+            return self._db_holder
+        except AttributeError:
+            self._db_holder = DefaultsDbHolder(self, get_attribute_defaults(type(self)))
+            return self._db_holder
@@ -6,11 +6,15 @@ set and has a single command defined on itself with the same name as its key,
 for allowing Characters to traverse the exit to its destination.
 
 """
-from evennia import DefaultExit, utils, Command
+from evennia import DefaultExit, Command
 from evennia.contrib.slow_exit import SlowExit
 from commands.queue import CommandQueue
 from commands.movement import handle_movement_queue
 import typeclasses.rooms as rooms
+from world import movement
+
+# the most rooms a collapsed speedwalk run crosses in one traversal
+MAX_RUN_STEPS = 10
 
 class Exit(DefaultExit):
     """
@@ -37,52 +41,97 @@ class Exit(DefaultExit):
                                         not be called if the attribute `err_traverse` is
                                         defined, in which case that will simply be echoed.
     """
+    def at_object_creation(self):
+        if self.location and self.destination and hasattr(self.location, "add_exit"):
+            self.location.add_exit(self)
+
+    def at_object_delete(self):
+        if self.location and hasattr(self.location, "remove_exit"):
+            self.location.remove_exit(self)
+        return True
+
     def at_traverse(self, traversing_object, target_location):
         """
-        Implements the actual traversal, using utils.delay to delay the move_to.
+        Implements the actual traversal, using the movement scheduler to delay the move_to.
         """
 
         # if the traverser has an Attribute move_speed, use that,
         # otherwise default to "walk" speed
         move_speed = traversing_object.db.move_speed or 4
 
-        def move_callback():
-            "This callback will be called by utils.delay after move_delay seconds."
-            source_location = traversing_object.location
-            command_queue = traversing_object.ndb.command_queue
-
-            if traversing_object.move_to(target_location):
-                self.at_after_traverse(traversing_object, source_location)
-                if command_queue:
-                    traversing_object.execute_cmd(command_queue.call_next())
-            else:
-                if self.db.err_traverse:
-                    # if exit has a better error message, let's use it.
-                    self.caller.msg(self.db.err_traverse)
-                else:
-                    # No shorthand error message. Call hook.
-                    self.at_failed_traverse(traversing_object)
-
         # check if traversing object is already moving. If it is, call the queue version of the exit command
         if traversing_object.ndb.currently_moving and not traversing_object.ndb.currently_moving.called:
             handle_movement_queue(traversing_object, self.key)
             return
 
-        traversing_object.msg("You start moving %s. It will take %s seconds." % (self.key, move_speed))
+        steps = [(self, target_location)]
+        command_queue = traversing_object.ndb.command_queue
+        if command_queue is not None and command_queue.collapse:
+            steps.extend(self.get_run(traversing_object, command_queue))
+        move_time = move_speed * len(steps)
+
+        def move_callback():
+            "This callback will be called by the movement scheduler after move_time seconds."
+            for exit_obj, destination in steps:
+                source_location = traversing_object.location
+                if traversing_object.move_to(destination, traversed_exit=exit_obj):
+                    exit_obj.at_after_traverse(traversing_object, source_location)
+                else:
+                    if exit_obj.db.err_traverse:
+                        # if exit has a better error message, let's use it.
+                        traversing_object.msg(exit_obj.db.err_traverse)
+                    else:
+                        # No shorthand error message. Call hook.
+                        exit_obj.at_failed_traverse(traversing_object)
+                    return
+            if command_queue:
+                traversing_object.execute_cmd(command_queue.call_next())
+
+        traversing_object.msg("You start moving %s. It will take %s seconds." % (self.key, move_time))
         rooms.dark_aware_msg(
             "|w{traversing_object}|n starts moving |w{exit}|n |W(it will take {move_speed} seconds)|n",
             self.location,
-            {"{traversing_object}":traversing_object.name, "{exit}":self.key, "{move_speed}":str(move_speed)},
-            {"{traversing_object}":"Someone", "{exit}":self.key, "{move_speed}":str(move_speed)},
+            {"{traversing_object}":traversing_object.name, "{exit}":self.key, "{move_speed}":str(move_time)},
+            {"{traversing_object}":"Someone", "{exit}":self.key, "{move_speed}":str(move_time)},
             traversing_object
         )
-        # create a delayed movement
-        t = utils.delay(move_speed, move_callback)
-        # we store the deferred on the character, this will allow us
+        # schedule a delayed movement
+        t = movement.schedule_move(traversing_object, move_time, move_callback)
+        # we store the pending move on the character, this will allow us
         # to abort the movement. We must use an ndb here since
-        # deferreds cannot be pickled.
+        # it cannot be pickled.
         traversing_object.ndb.currently_moving = t
 
+    def get_run(self, traversing_object, command_queue):
+        """
+        Take queued moves in this exit's direction off the queue and find
+        the exits they lead through, so a straight stretch can be walked
+        as one traversal. The run stops before an exit the traverser
+        isn't allowed through.
+
+        Args:
+            traversing_object (Object): the one walking the run.
+            command_queue (CommandQueue): the traverser's command queue.
+
+        Returns:
+            steps (list): (exit, destination) for each extra step.
+        """
+        steps = []
+        count = command_queue.pop_run(self.key, MAX_RUN_STEPS - 1)
+        room = self.destination
+        for step in range(count):
+            if hasattr(room, "get_exit"):
+                next_exit = room.get_exit(self.key)
+            else:
+                next_exit = next((ex for ex in room.exits if ex.key == self.key), None)
+            if not next_exit or not next_exit.access(traversing_object, "traverse"):
+                # put back what we can't walk, it fails when it is reached
+                command_queue.push_front(self.key, count - step)
+                break
+            steps.append((next_exit, next_exit.destination))
+            room = next_exit.destination
+        return steps
+
     def return_appearance(self, looker, **kwargs):
         return self.destination.return_appearance(looker, **kwargs)
 
@@ -14,9 +14,13 @@ inheritance.
 import itertools
 from evennia import DefaultObject, utils
 from evennia.objects.models import ObjectDB
+from evennia.typeclasses.attributes import AttributeHandler
+from evennia.utils import logger, list_to_string, lazy_property
+from django.db import transaction
 import commands.inventory as inv_utils
 import typeclasses.rooms as rooms
-from world import rules
+from world import rules, lighting
+from typeclasses.defaults import AttributeDefaultsMixin
 
 PUDDLE_PREFIX = {1:"tiny",
                  3:"small",
@@ -25,28 +29,306 @@ PUDDLE_PREFIX = {1:"tiny",
                  22:"huge",
                  40:"massive"}
 
-class Object(DefaultObject):
+# Attributes the cached masses are worked out from
+MASS_ATTRIBUTES = ("mass", "count", "mass_reduction")
+
+
+class MassAttributeHandler(AttributeHandler):
+    """
+    Attribute handler that keeps the cached masses current when one of
+    the `MASS_ATTRIBUTES` is written, however it is written (`db`,
+    `@set`, or the Attributes given to `create_object`/`copy_object`).
+    """
+    def _update_mass(self, func, *args, **kwargs):
+        obj = self.obj
+        old_mass, old_own_mass = obj.get_mass(), obj.get_own_mass()
+        result = func(*args, **kwargs)
+        obj.at_mass_changed(old_mass, old_own_mass)
+        return result
+
+    def add(self, key, *args, **kwargs):
+        if key in MASS_ATTRIBUTES:
+            return self._update_mass(super().add, key, *args, **kwargs)
+        return super().add(key, *args, **kwargs)
+
+    def batch_add(self, *args, **kwargs):
+        return self._update_mass(super().batch_add, *args, **kwargs)
+
+    def remove(self, key=None, *args, **kwargs):
+        if key is None or key in MASS_ATTRIBUTES:
+            return self._update_mass(super().remove, key, *args, **kwargs)
+        return super().remove(key, *args, **kwargs)
+
+    def clear(self, *args, **kwargs):
+        return self._update_mass(super().clear, *args, **kwargs)
+
+
+class Object(AttributeDefaultsMixin, DefaultObject):
+    """
+    Objects keep a cached total of the mass of everything inside them
+    (in ndb), updated up the containment chain as things move in and out
+    and as `mass`, `count` or `mass_reduction` are written, so `get_mass`
+    doesn't have to walk the contents. `check_mass` finds and fixes
+    stale caches.
+
+    Default Attribute values are declared in `attribute_defaults`, see
+    typeclasses/defaults.py.
+    """
+    attribute_defaults = {"mass": 1}
+
+    def at_object_receive(self, moved_obj, source_location, **kwargs):
+        super().at_object_receive(moved_obj, source_location, **kwargs)
+        lighting.at_object_receive(self, moved_obj)
+        if hasattr(moved_obj, "get_mass"):
+            self.change_contents_mass(moved_obj.get_mass(), moved_obj.get_own_mass())
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        super().at_object_leave(moved_obj, target_location, **kwargs)
+        lighting.at_object_leave(self, moved_obj)
+        if hasattr(moved_obj, "get_mass"):
+            self.change_contents_mass(-moved_obj.get_mass(), -moved_obj.get_own_mass())
+
+    def at_object_delete(self):
+        # a deleted light source no longer lights its room
+        if self.location:
+            lighting.at_object_leave(self.location, self)
+            if hasattr(self.location, "change_contents_mass"):
+                self.location.change_contents_mass(-self.get_mass(), -self.get_own_mass())
+            if hasattr(self.location, "bump_contents_gen"):
+                self.location.bump_contents_gen()
+        return True
+
+    def get_count(self):
+        """How many items this object stands for, see Stackable."""
+        return 1
+
+    @lazy_property
+    def attributes(self):
+        return MassAttributeHandler(self)
+
+    def get_unit_mass(self):
+        # not cached on ndb, Attribute reads are cached already
+        return self.db.mass
+
+    def get_own_mass(self):
+        return self.get_unit_mass() * self.get_count()
+
+    def get_mass_reduction(self):
+        return 1.0
+
+    def get_contents_total_mass(self):
+        total = self.ndb.contents_mass
+        if total is None:
+            total = sum(obj.get_mass() for obj in self.contents)
+            self.ndb.contents_mass = total
+        return total
+
     def get_mass(self, modifier=1.0):
-        mass = self.attributes.get("mass", 1)
-        return mass + (sum(obj.get_mass() for obj in self.contents) * modifier)
+        return self.get_own_mass() + (self.get_contents_total_mass() * modifier)
 
     def get_mass_modified(self, modifier=1.0):
-        mass = self.attributes.get("mass", 1)
-        return mass * modifier
+        return self.get_own_mass() * modifier
+
+    def change_contents_mass(self, total_delta, own_delta=0):
+        """
+        Update the cached contents mass of this object and everything
+        it is inside of.
+
+        Args:
+            total_delta (float): change in the total mass of the contents.
+            own_delta (float, optional): change in the summed own mass
+                of the direct contents.
+        """
+        if self.ndb.contents_own_mass is not None:
+            self.ndb.contents_own_mass += own_delta
+        obj = self
+        while obj is not None and hasattr(obj, "change_contents_mass"):
+            if obj.ndb.contents_mass is not None:
+                obj.ndb.contents_mass += total_delta
+            # how much the mass of obj itself changed
+            total_delta *= obj.get_mass_reduction()
+            obj = obj.location
+
+    def reset_contents_mass(self):
+        """
+        Forget the cached contents mass of this object and everything it
+        is inside of, it is recounted the next time it is needed.
+        """
+        obj = self
+        while obj is not None and hasattr(obj, "change_contents_mass"):
+            obj.ndb.contents_mass = None
+            obj.ndb.contents_own_mass = None
+            obj = obj.location
+
+    def at_mass_changed(self, old_mass, old_own_mass):
+        """
+        Called by the Attribute handler after an Attribute the mass
+        depends on was written. Drops the cached values read from
+        Attributes and passes the change on to the containers.
+
+        Args:
+            old_mass (float): `get_mass()` before the write.
+            old_own_mass (float): `get_own_mass()` before the write.
+        """
+        self.ndb.count = None
+        self.ndb.mass_reduction = None
+        if hasattr(self.location, "change_contents_mass"):
+            self.location.change_contents_mass(self.get_mass() - old_mass,
+                                               self.get_own_mass() - old_own_mass)
+
+    def set_mass(self, mass):
+        self.db.mass = mass
+
+    def set_doing_desc(self, doing_desc, doing_prefix=None):
+        """
+        Set what the object is shown doing in a room's furniture list,
+        e.g. "a |wchair|n by the fire". The room's cached appearance is
+        refreshed.
+
+        Args:
+            doing_desc (str or None): shown after the name.
+            doing_prefix (str, optional): shown before the name.
+        """
+        self.db.doing_desc = doing_desc
+        self.db.doing_prefix = doing_prefix
+        if hasattr(self.location, "bump_contents_gen"):
+            self.location.bump_contents_gen()
+
+    def check_mass(self, fix=False):
+        """
+        Compare the cached masses of this object and everything inside
+        it with freshly calculated ones.
+
+        Args:
+            fix (bool, optional): reset the caches that are wrong.
+
+        Returns:
+            errors (list): (object, cached, actual) for every object whose
+                cached contents mass is wrong.
+        """
+        errors = []
+        self._check_mass(fix, errors)
+        return errors
+
+    def _check_mass(self, fix, errors):
+        """Check the caches recursively, returns the actual total mass."""
+        actual = 0
+        for obj in self.contents:
+            if hasattr(obj, "_check_mass"):
+                actual += obj._check_mass(fix, errors)
+        cached = self.get_contents_total_mass()
+        unit_mass = self.db.mass
+        if abs(cached - actual) > 0.001:
+            errors.append((self, cached, actual))
+            if fix:
+                self.ndb.count = None
+                self.ndb.mass_reduction = None
+                self.ndb.contents_mass = actual
+                self.ndb.contents_own_mass = None
+        return unit_mass * self.get_count() + actual * self.get_mass_reduction()
+
+class Stackable(Object):
+    """
+    One object standing in for a stack of identical items (ammo,
+    materials and the like), `db.count` says how many. Its mass is the
+    mass of one item times the count.
+
+    Stacks of the same typeclass and key merge when they end up in the
+    same place, `split` takes part of a stack off as a new object.
+    """
+    is_stackable = True
+    attribute_defaults = {"count": 1}
+
+    def get_count(self):
+        count = self.ndb.count
+        if count is None:
+            count = self.db.count
+            self.ndb.count = count
+        return count
+
+    def set_count(self, count):
+        """
+        Change the size of the stack. The Attribute handler keeps the
+        mass caches of everything it is in current.
+        """
+        self.db.count = count
+        if hasattr(self.location, "bump_contents_gen"):
+            self.location.bump_contents_gen()
+
+    def stacks_with(self, other):
+        return (other is not self
+                and getattr(other, "is_stackable", False)
+                and other.typeclass_path == self.typeclass_path
+                and other.key == self.key)
+
+    def split(self, count):
+        """
+        Take count items off the stack as a new stack in the same place.
+
+        Args:
+            count (int): how many items to take.
+
+        Returns:
+            stack (obj): the new stack, or this one if count is the
+                whole stack.
+        """
+        if count >= self.get_count():
+            return self
+        remaining = self.get_count() - count
+        # copy_object runs the receive and move hooks of the copy before
+        # its Attributes are copied, while it still has the default count
+        # (at_after_move doesn't merge it, it comes from no location).
+        # Set both counts and let the containers recount their mass.
+        stack = ObjectDB.objects.copy_object(self)
+        stack.db.count = count
+        self.db.count = remaining
+        if hasattr(self.location, "reset_contents_mass"):
+            self.location.reset_contents_mass()
+        if hasattr(self.location, "bump_contents_gen"):
+            self.location.bump_contents_gen()
+        return stack
+
+    def at_after_move(self, source_location, **kwargs):
+        super().at_after_move(source_location, **kwargs)
+        if not self.location or source_location is None:
+            # a new object (created or split off) doesn't have its
+            # Attributes yet, so it can't be merged
+            return
+        # absorb the stacks of the same item already here
+        others = [obj for obj in self.location.contents if self.stacks_with(obj)]
+        if others:
+            count = self.get_count() + sum(obj.get_count() for obj in others)
+            with transaction.atomic():
+                for obj in others:
+                    obj.delete()
+                self.set_count(count)
 
 class ContainerMassMixin(Object):
+    def get_mass_reduction(self):
+        reduction = self.ndb.mass_reduction
+        if reduction is None:
+            reduction = self.db.mass_reduction
+            self.ndb.mass_reduction = reduction
+        return reduction
+
     def get_mass(self, modifier=1.0):
-        return super().get_mass(self.db.mass_reduction)
+        return super().get_mass(self.get_mass_reduction())
 
     def get_contents_mass(self):
-        return sum(obj.get_mass_modified(self.db.mass_reduction) for obj in self.contents)
+        own_mass = self.ndb.contents_own_mass
+        if own_mass is None:
+            own_mass = sum(obj.get_own_mass() for obj in self.contents)
+            self.ndb.contents_own_mass = own_mass
+        return own_mass * self.get_mass_reduction()
+
+    def set_mass_reduction(self, reduction):
+        self.db.mass_reduction = reduction
 
 class Container(ContainerMassMixin, Object):
-    def at_object_creation(self):
-        self.db.container = True
-        self.db.capacity = 100
-        self.db.mass_reduction = 0.90
-        self.db.category = "container"
+    attribute_defaults = {"container": True,
+                          "capacity": 100,
+                          "mass_reduction": 0.90,
+                          "category": "container"}
 
     def return_appearance(self, looker, **kwargs):
         description = f"|y{self.get_display_name(looker).capitalize()}|n\n"
@@ -56,17 +338,54 @@ class Container(ContainerMassMixin, Object):
         description += f"\n\n{items}"
         return description
 
+class LightSource(Object):
+    """
+    Something that can be lit to light up a dark room, like a torch or a
+    lantern. Light it and put it out through the `lit` property, the
+    rooms keep count of their light sources and `world.lighting` has to
+    hear about the change.
+    """
+    attribute_defaults = {"lit": False,
+                          "category": "tool"}
+
+    @property
+    def lit(self):
+        return bool(self.db.lit)
+
+    @lit.setter
+    def lit(self, value):
+        lighting.set_lit(self, value)
+
 class Consumable(Object):
-    def at_object_creation(self):
-        self.db.category = "consumable"
-        self.db.uses = 1
-        self.db.effects = {}
-        self.db.consume_msg = "|w{character}|n consumes a use of |w{item}|n."
-        self.db.consume_msg_self = "|wYou|n consume a use of |w"
-        self.db.use_on_msg = "|w{character}|n uses |w{item}|n on |w{target}|n."
-        self.db.use_on_msg_self = ["|wYou|n use |w{item}|n", " on |w"]
-        self.db.consume_type = "use"
-        self.db.usable_on_target = False
+    attribute_defaults = {"category": "consumable",
+                          "uses": 1,
+                          "effects": {},
+                          "consume_msg": "|w{character}|n consumes a use of |w{item}|n.",
+                          "consume_msg_self": "|wYou|n consume a use of |w",
+                          "use_on_msg": "|w{character}|n uses |w{item}|n on |w{target}|n.",
+                          "use_on_msg_self": ["|wYou|n use |w{item}|n", " on |w"],
+                          "consume_type": "use",
+                          "usable_on_target": False}
+
+    def at_init(self):
+        super().at_init()
+        # compile the effects when loaded, so broken ones show up in the log
+        self.get_effect_ops()
+
+    def get_effect_ops(self):
+        """
+        Get the consumable's effects compiled by `rules.compile_effects`.
+        They are compiled once and cached until `db.effects` changes.
+        """
+        effects = self.db.effects or {}
+        cached = self.ndb.effect_ops
+        if cached and cached[0] == effects:
+            return cached[1]
+        ops, errors = rules.compile_effects(effects)
+        for error in errors:
+            logger.log_warn(f"{self.key}({self.dbref}) has a bad effect: {error}")
+        self.ndb.effect_ops = (dict(effects), ops)
+        return ops
 
     def consume(self, user, target=None):
         self.db.uses -= 1 
@@ -80,7 +399,7 @@ class Consumable(Object):
                 {"{character}":"Someone", "{item}":"something"},
                 user
             )
-            rules.apply_effects(self.db.effects, user)
+            rules.apply_ops(self.get_effect_ops(), user)
         else:
             if not self.db.usable_on_target:
                 user.msg(f"You can't use {self.name} on someone/something else.")
@@ -93,18 +412,21 @@ class Consumable(Object):
                 {"{character}":"Someone", "{target}":"someone", "{item}":"something"},
                 user
             )
-            rules.apply_effects(self.db.effects, target)
+            rules.apply_ops(self.get_effect_ops(), target)
 
         if self.db.uses <= 0:
             user.msg(f"The {self.name} has been used up.")
             self.delete()
 
 class Liquid(Consumable):
+    # rooms keep an index of the liquids in them, see Room.get_liquid_index
+    is_liquid = True
+    attribute_defaults = {"get_err_msg": "You can't |wget|n liquids with your bare hands. Try |wfilling|n a container instead.",
+                          "consume_type": "drink"}
+
     def at_object_creation(self):
         super().at_object_creation()
         self.locks.add("get:false()")
-        self.db.get_err_msg = "You can't |wget|n liquids with your bare hands. Try |wfilling|n a container instead."
-        self.db.consume_type = "drink"
         self.db.original_name = self.name
 
     def return_appearance(self, looker, **kwargs):
@@ -118,35 +440,43 @@ class Liquid(Consumable):
         prefix = PUDDLE_PREFIX.get(self.db.uses) or PUDDLE_PREFIX[
                  min(PUDDLE_PREFIX.keys(), key=lambda key: abs(key-self.db.uses))]
         self.name = f"{prefix} puddle of {self.db.original_name}"
+        if hasattr(self.location, "bump_contents_gen"):
+            self.location.bump_contents_gen()
 
     def at_after_move(self, source_location, **kwargs):
         super().at_after_move(source_location, **kwargs)
-        if not self.location.is_typeclass("typeclasses.rooms.Room"):
-            self.location.msg_contents("Not in a room")
+        location = self.location
+        if not location.is_typeclass("typeclasses.rooms.Room"):
+            location.msg_contents("Not in a room")
             return 
 
-        for obj in self.location.contents:
-            if obj is self:
-                continue
-
-            if (obj.is_typeclass("typeclasses.objects.Liquid")
-                and obj.db.original_name == self.db.original_name):
-                self.db.uses += obj.db.uses
-                self.location.msg_contents(f"{obj.name} is absorbed into {self.name}. {self.name} now has {self.db.uses} units.")
-                obj.delete()
+        # fold every other puddle of the same liquid into this one
+        others = [obj for obj in location.get_liquids(self.db.original_name) if obj is not self]
+        if others:
+            self.db.uses += sum(obj.db.uses for obj in others)
+            names = list_to_string([obj.name for obj in others])
+            is_are = "is" if len(others) == 1 else "are"
+            location.msg_contents(f"{names} {is_are} absorbed into {self.name}. {self.name} now has {self.db.uses} units.")
+            with transaction.atomic():
+                for obj in others:
+                    obj.delete()
         self.set_puddle_name()
 
+    def at_object_delete(self):
+        if hasattr(self.location, "remove_liquid"):
+            self.location.remove_liquid(self)
+        return super().at_object_delete()
+
     def at_before_get(self, getter, **kwargs):
         getter.msg("Getting object")
         self.name = self.db.original_name
         return True
 
 class LiquidContainer(ContainerMassMixin, Object):
-    def at_object_creation(self):
-        self.db.liquid_container = True
-        self.db.capacity = 5
-        self.db.mass_reduction = 1
-        self.db.category = "container"
+    attribute_defaults = {"liquid_container": True,
+                          "capacity": 5,
+                          "mass_reduction": 1,
+                          "category": "container"}
 
     def fill(self, source, caller=None):
         # If source is a liquid container, get liquid from container
@@ -86,34 +86,32 @@ typeclass or use the `typeclass` command to swap existing rooms.
 
 import re
 import time
-from datetime import datetime
 from django.conf import settings
 from evennia import DefaultRoom
-from evennia import gametime
 from evennia import default_cmds
 from evennia import utils
 from evennia import CmdSet
 from evennia.utils.evtable import wrap
-from world import mapping
-from typeclasses.scripts.gametime import get_time_and_season 
+from world import mapping, lighting
+from typeclasses.scripts.gametime import CLOCK, get_time_and_season, get_clock_epoch, get_game_datetime
+from typeclasses.scripts.utils import LRUCache
+from typeclasses.defaults import AttributeDefaultsMixin
 import commands.inventory as inv
 
 # error return function, needed by Extended Look command
 _AT_SEARCH_RESULT = utils.variable_from_module(*settings.SEARCH_AT_RESULT.rsplit(".", 1))
 
-# regexes for in-desc replacements
-RE_MORNING = re.compile(r"<morning>(.*?)</morning>", re.IGNORECASE)
-RE_AFTERNOON = re.compile(r"<afternoon>(.*?)</afternoon>", re.IGNORECASE)
-RE_EVENING = re.compile(r"<evening>(.*?)</evening>", re.IGNORECASE)
-RE_NIGHT = re.compile(r"<night>(.*?)</night>", re.IGNORECASE)
-# this map is just a faster way to select the right regexes (the first
-# regex in each tuple will be parsed, the following will always be weeded out)
-REGEXMAP = {
-    "morning": (RE_MORNING, RE_AFTERNOON, RE_EVENING, RE_NIGHT),
-    "afternoon": (RE_AFTERNOON, RE_MORNING, RE_EVENING, RE_NIGHT),
-    "evening": (RE_EVENING, RE_MORNING, RE_AFTERNOON, RE_NIGHT),
-    "night": (RE_NIGHT, RE_MORNING, RE_AFTERNOON, RE_EVENING),
-}
+# regex for in-desc timeslot markers, e.g. <morning>...</morning>
+RE_TIMESLOT = re.compile(r"<(morning|afternoon|evening|night)>(.*?)</\1>", re.IGNORECASE)
+# how many parsed descriptions and details a room keeps
+SEGMENT_CACHE_SIZE = 32
+# rendered room descriptions, {(room id, clock epoch): desc}
+DESC_CACHE_SIZE = 4096
+_DESC_CACHE = LRUCache(DESC_CACHE_SIZE)
+# rooms looked at recently, their descriptions are rendered ahead of
+# time when the timeslot changes. {room id: room}
+PREWARM_ROOMS = 256
+_RECENT_ROOMS = LRUCache(PREWARM_ROOMS)
 
 # set up the seasons and time slots. This assumes gametime started at the
 # beginning of the year (so month 1 is equivalent to January), and that
@@ -125,74 +123,101 @@ DAY_BOUNDARIES = (0, 6 / 24.0, 12 / 24.0, 18 / 24.0)
 
 # helpers
 
+def parse_timeslots(raw_desc):
+    """
+    Split a description into the parts shown at every timeslot and the
+    parts inside timeslot markers.
+
+    Args:
+        raw_desc (str): the description with `<timeslot>...</timeslot>`
+            markers.
+
+    Returns:
+        segments (tuple): (timeslot, text) pairs in order, timeslot is
+            None for text that is always shown.
+    """
+    segments = []
+    pos = 0
+    for match in RE_TIMESLOT.finditer(raw_desc):
+        if match.start() > pos:
+            segments.append((None, raw_desc[pos:match.start()]))
+        segments.append((match.group(1).lower(), match.group(2)))
+        pos = match.end()
+    if pos < len(raw_desc):
+        segments.append((None, raw_desc[pos:]))
+    return tuple(segments)
+
+def render_timeslots(segments, timeslot):
+    """
+    Join the segments of a parsed description that show at timeslot.
+    """
+    return "".join(text for slot, text in segments if slot is None or slot == timeslot)
+
+def prewarm_descs():
+    """
+    Render the descriptions of recently looked at rooms for the current
+    season and timeslot, then schedule the next run for the next
+    timeslot change.
+    """
+    try:
+        epoch = get_clock_epoch()
+        for room_id, room in list(_RECENT_ROOMS.data.items()):
+            key = (room_id, epoch)
+            if key not in _DESC_CACHE.data:
+                _DESC_CACHE.set(key, room.render_desc())
+    finally:
+        start_desc_prewarm()
+
+def start_desc_prewarm():
+    """
+    Schedule `prewarm_descs` for just after the next timeslot change.
+    """
+    utils.delay(CLOCK.seconds_until_change() + 1, prewarm_descs)
+
+
 def dark_aware_msg(message, location, mapping, mapping_dark, exclude=None):
     """
-    Calls msg_contents for a location that changes based on whether or
-    not a room is dark or a character has night vision.
+    Sends a message to everything in a location, changing it based on
+    whether or not the room is dark or a character has night vision.
 
     Args:
         message (string): the message that should be sent to the room
-        location (obj): the room object that will make the msg_contents call
+        location (obj): the room the message is sent in
         mapping (dict): mapping of formatting keys
         mapping_dark (dict): mapping of formatting keys if the room is dark
         exclude (object or list, optional): objects to exclude from the msg
 
     Notes:
+        The room's contents are walked once. Characters that can't see
+        get the dark message, everything else gets the lit message.
 
     """
     message_lit = message
     for mapped, replacement in mapping.items():
         message_lit = message_lit.replace(mapped, replacement) 
-    # if it is not dark, just send a message as normal
-    if not location.db.dark:
-        location.msg_contents(message_lit, exclude)
+
+    exclude = set(utils.make_iter(exclude)) if exclude else set()
+
+    # if it is not dark, or any lit items are present, everyone
+    # gets the lit message
+    if not location.db.dark or lighting.is_lit(location):
+        for obj in location.contents:
+            if obj not in exclude:
+                obj.msg(message_lit)
         return
 
     message_dark = message
     for mapped, replacement in mapping_dark.items():
         message_dark = message_dark.replace(mapped, replacement)
 
-    # grab all the characters in the location
-    characters = [character for character in location.contents if character.is_typeclass("typeclasses.characters.Character", exact=False)]
-    # init lists
-    lit_items = []
-    night_vision = []
-    normal_vision = []
-
-    # check location for lit items on the ground
-    location_lit_items = location.search(True, attribute_name="lit", quiet=True)
-    if location_lit_items:
-        lit_items.append(location_lit_items)
-
-    for character in characters:
-        # check if characters here are carrying lit items
-        carried_lit_items = character.search(True, attribute_name="lit", quiet=True)
-        if carried_lit_items:
-            lit_items.append(carried_lit_items)
-        # check if character has night vision.
-        if character.db.nightvision:
-            night_vision.append(character)
+    # send message_dark to characters without nightvision
+    for obj in location.contents:
+        if obj in exclude:
+            continue
+        if inv.get_kind(obj) == "character" and not obj.nightvision:
+            obj.msg(message_dark)
         else:
-            normal_vision.append(character)
-
-    # if any lit items are present, send the lit message
-    if lit_items:
-        location.msg_contents(message_lit, exclude)
-        return
-
-    # if there are no lit items present, send message_dark to characters without
-    # nightvision
-    if exclude and exclude.is_typeclass("typeclasses.characters.Character"):# or type(exclude) is obj:
-        night_vision.append(exclude)
-        normal_vision.append(exclude)
-    elif type(exclude) is list:
-        night_vision.extend(exclude)
-        normal_vision.extend(exclude)
-
-    # send lit message and exclude those with normal vision
-    location.msg_contents(message_lit, normal_vision)
-    # send dark message and exclude those with night vision
-    location.msg_contents(message_dark, night_vision)
+            obj.msg(message_lit)
 
 
 def unpack_description(mini_map, room_desc):
@@ -213,34 +238,89 @@ def unpack_description(mini_map, room_desc):
             string += "\n"
     return string
 
-class Room(DefaultRoom):
+class Room(AttributeDefaultsMixin, DefaultRoom):
     """
     This room implements a more advanced `look` functionality depending on
     time. It also allows for "details", together with a slightly modified
     look command.
     """
+    attribute_defaults = {"spring_desc": "",
+                          "summer_desc": "",
+                          "autumn_desc": "",
+                          "winter_desc": "",
+                          # the general desc is used as a fallback if a
+                          # seasonal one is not set
+                          "general_desc": "",
+                          # the general desc if no general_desc is set,
+                          # rendered for the current timeslot by
+                          # get_current_desc
+                          "desc": "",
+                          # coordinates
+                          "x": 0,
+                          "y": 0,
+                          "z": 0,
+                          # detail storage
+                          "details": {}}
+
+    def basetype_posthook_setup(self):
+        """
+        Called once when the room is first created, after the tags
+        and Attributes given to `create_object` have been added.
+        """
+        super().basetype_posthook_setup()
+        mapping.update_room(self)
+
+    def at_object_delete(self):
+        """Called just before the room is deleted."""
+        mapping.remove_room(self)
+        _RECENT_ROOMS.pop(self.id)
+        return True
+
+    def set_coords(self, x, y, z):
+        """
+        Move the room to new coordinates, keeping the zone index current.
+
+        Args:
+            x (int): the x coordinate.
+            y (int): the y coordinate.
+            z (int): the z coordinate.
+
+        """
+        self.db.x = x
+        self.db.y = y
+        self.db.z = z
+        mapping.update_room(self)
 
-    def at_object_creation(self):
-        """Called when room is first created only."""
-        self.db.spring_desc = ""
-        self.db.summer_desc = ""
-        self.db.autumn_desc = ""
-        self.db.winter_desc = ""
-        # the general desc is used as a fallback if a seasonal one is not set
-        self.db.general_desc = ""
-        # will be set dynamically. Can contain raw timeslot codes
-        self.db.raw_desc = ""
-        # this will be set dynamically at first look. Parsed for timeslot codes
-        self.db.desc = ""
-        # coordinates
-        self.db.x = 0
-        self.db.y = 0
-        self.db.z = 0
-        # these will be filled later
-        self.ndb.last_season = None
-        self.ndb.last_timeslot = None
-        # detail storage
-        self.db.details = {}
+    def set_zone(self, zone_tag):
+        """
+        Move the room to another zone, keeping the zone index current.
+
+        Args:
+            zone_tag (str or None): the new zone tag, None leaves the
+                room without a zone.
+
+        """
+        for old_tag in self.tags.get(category="zone", return_list=True):
+            self.tags.remove(old_tag, category="zone")
+        if zone_tag:
+            self.tags.add(zone_tag, category="zone")
+        mapping.update_room(self)
+
+    def set_symbol(self, symbol):
+        """
+        Change the symbol the room is drawn with on the map, keeping the
+        zone index current.
+
+        Args:
+            symbol (str or None): the new symbol, None goes back to the
+                default symbol.
+
+        """
+        if symbol is None:
+            self.attributes.remove("symbol")
+        else:
+            self.db.symbol = symbol
+        mapping.update_room(self)
 
     def replace_timeslots(self, raw_desc, curr_time):
         """
@@ -256,13 +336,62 @@ class Room(DefaultRoom):
 
         """
         if raw_desc:
-            regextuple = REGEXMAP[curr_time]
-            raw_desc = regextuple[0].sub(r"\1", raw_desc)
-            raw_desc = regextuple[1].sub("", raw_desc)
-            raw_desc = regextuple[2].sub("", raw_desc)
-            return regextuple[3].sub("", raw_desc)
+            return render_timeslots(self.get_segments(raw_desc), curr_time)
         return raw_desc
 
+    def get_segments(self, raw_desc):
+        """
+        Get a description or detail parsed for timeslot markers. Parsed
+        texts are cached on the room, so each is only parsed once.
+
+        Args:
+            raw_desc (str): The unmodified description.
+
+        Returns:
+            segments (tuple): see `parse_timeslots`.
+
+        """
+        cache = self.ndb.segments
+        if cache is None:
+            cache = self.ndb.segments = {}
+        segments = cache.get(raw_desc)
+        if segments is None:
+            if len(cache) >= SEGMENT_CACHE_SIZE:
+                cache.clear()
+            segments = cache[raw_desc] = parse_timeslots(raw_desc)
+        return segments
+
+    def get_current_desc(self):
+        """
+        Get the description for the current season and timeslot. It is
+        rendered once per clock epoch and kept in a shared cache, nothing
+        is written to the database.
+        """
+        key = (self.id, get_clock_epoch())
+        desc = _DESC_CACHE.get(key)
+        if desc is None:
+            desc = self.render_desc()
+            _DESC_CACHE.set(key, desc)
+        _RECENT_ROOMS.set(self.id, self)
+        return desc
+
+    def render_desc(self):
+        """
+        Render the description for the current season and timeslot.
+        """
+        season, timeslot = get_time_and_season()
+        raw_desc = (getattr(self.db, "%s_desc" % season)
+                    or self.db.general_desc or self.db.desc or "")
+        return self.replace_timeslots(raw_desc, timeslot)
+
+    def clear_desc_cache(self):
+        """
+        Forget the rendered description, call this after changing any of
+        the room's descriptions.
+        """
+        _DESC_CACHE.pop((self.id, get_clock_epoch()))
+        self.ndb.render_cache = None
+
     def return_detail(self, key):
         """
         This will attempt to match a "detail" to look for in the room.
@@ -330,6 +459,210 @@ class Room(DefaultRoom):
         if self.db.details and detailkey.lower() in self.db.details:
             del self.db.details[detailkey.lower()]
 
+    def at_object_receive(self, moved_obj, source_location, **kwargs):
+        """Called after an object has been moved into this room."""
+        super().at_object_receive(moved_obj, source_location, **kwargs)
+        lighting.at_object_receive(self, moved_obj)
+        if moved_obj.destination:
+            self.add_exit(moved_obj)
+        else:
+            self.bump_contents_gen()
+        if getattr(moved_obj, "is_liquid", False):
+            self.add_liquid(moved_obj)
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        """Called just before an object leaves this room."""
+        super().at_object_leave(moved_obj, target_location, **kwargs)
+        lighting.at_object_leave(self, moved_obj)
+        if moved_obj.destination:
+            self.remove_exit(moved_obj)
+        else:
+            self.bump_contents_gen()
+        if getattr(moved_obj, "is_liquid", False):
+            self.remove_liquid(moved_obj)
+
+    def bump_contents_gen(self):
+        """
+        Mark the room's contents as changed. This invalidates the cached
+        parts of the room's appearance. Call it when something in the room
+        changes how it is listed (e.g. it gets renamed).
+        """
+        self.ndb.contents_gen = (self.ndb.contents_gen or 0) + 1
+
+    def get_exit_table(self):
+        """
+        Get the room's exit lookup tables, building them on first use.
+
+        Returns:
+            table (dict): {"destination": {room id: exit},
+                "direction": {exit key: exit}}
+        """
+        table = self.ndb.exit_table
+        if table is None:
+            table = {"destination": {}, "direction": {}}
+            self.ndb.exit_table = table
+            for obj in self.contents:
+                if obj.destination:
+                    self.add_exit(obj)
+        return table
+
+    def add_exit(self, exit_obj):
+        """Add an exit to the exit tables, if they are built."""
+        self.bump_contents_gen()
+        table = self.ndb.exit_table
+        if table is None:
+            return
+        table["destination"].setdefault(exit_obj.destination.id, exit_obj)
+        table["direction"].setdefault(exit_obj.key.lower(), exit_obj)
+
+    def remove_exit(self, exit_obj):
+        """Remove an exit from the exit tables, if they are built."""
+        if self.ndb.exit_table is not None:
+            # rebuild in case another exit leads the same way
+            self.ndb.exit_table = None
+        self.bump_contents_gen()
+
+    def get_exit_to(self, destination):
+        """
+        Find the exit in this room leading to destination. A miss
+        rebuilds the tables, so it costs as much as searching the room.
+
+        Args:
+            destination (Object): the room the exit should lead to.
+
+        Returns:
+            exit (Object or None): the exit, if there is one.
+        """
+        fresh = self.ndb.exit_table is None
+        exit_obj = self.get_exit_table()["destination"].get(destination.id)
+        if not fresh and (not exit_obj or exit_obj.location != self
+                          or exit_obj.destination != destination):
+            # an exit may have been moved or relinked (e.g. with @link)
+            # without the room hearing of it, rebuild the tables
+            self.ndb.exit_table = None
+            exit_obj = self.get_exit_table()["destination"].get(destination.id)
+        return exit_obj
+
+    def get_exit(self, direction):
+        """
+        Find the exit in this room with the given key.
+
+        Args:
+            direction (str): the exit key, e.g. "north".
+
+        Returns:
+            exit (Object or None): the exit, if there is one.
+        """
+        fresh = self.ndb.exit_table is None
+        exit_obj = self.get_exit_table()["direction"].get(direction.lower())
+        if not fresh and (not exit_obj or exit_obj.location != self
+                          or exit_obj.key.lower() != direction.lower()):
+            # an exit may have been moved, relinked or renamed
+            self.ndb.exit_table = None
+            exit_obj = self.get_exit_table()["direction"].get(direction.lower())
+        return exit_obj
+
+    def get_liquid_index(self):
+        """
+        Get the liquids in the room, building the index on first use.
+
+        Returns:
+            index (dict): {original name: set of liquids}
+        """
+        index = self.ndb.liquid_index
+        if index is None:
+            index = {}
+            self.ndb.liquid_index = index
+            for obj in self.contents:
+                if getattr(obj, "is_liquid", False):
+                    index.setdefault(obj.db.original_name, set()).add(obj)
+        return index
+
+    def add_liquid(self, liquid):
+        """Add a liquid to the liquid index, if it is built."""
+        index = self.ndb.liquid_index
+        if index is not None:
+            index.setdefault(liquid.db.original_name, set()).add(liquid)
+
+    def remove_liquid(self, liquid):
+        """Remove a liquid from the liquid index, if it is built."""
+        index = self.ndb.liquid_index
+        if index is None:
+            return
+        liquids = index.get(liquid.db.original_name)
+        if liquids is not None:
+            liquids.discard(liquid)
+            if not liquids:
+                del index[liquid.db.original_name]
+
+    def get_liquids(self, original_name):
+        """
+        Find the liquids in this room with the given original name.
+
+        Args:
+            original_name (str): the liquid's name, e.g. "water".
+
+        Returns:
+            liquids (list): the liquids.
+        """
+        liquids = self.get_liquid_index().get(original_name, ())
+        if any(obj.location != self for obj in liquids):
+            # something was moved without the hooks, rebuild
+            self.ndb.liquid_index = None
+            liquids = self.get_liquid_index().get(original_name, ())
+        return list(liquids)
+
+    def get_render_parts(self):
+        """
+        Get the parts of the room's appearance that look the same to
+        everyone. They are cached until the season, timeslot, description
+        or contents of the room change. Renames are caught by comparing
+        the keys of the contents, other changes to how something is
+        listed have to call `bump_contents_gen`.
+
+        Returns:
+            parts (dict): "desc", "furniture" and "items" as lists of
+                wrapped lines, "mobs" as a list of characters and "exits"
+                as the finished exit bar.
+        """
+        desc = self.get_current_desc()
+        names = tuple(obj.db_key for obj in self.contents)
+        key = (get_clock_epoch(), self.ndb.contents_gen, desc, names)
+        cached = self.ndb.render_cache
+        if cached and cached[0] == key:
+            return cached[1]
+
+        parts = {}
+        # Desc
+        parts["desc"] = [f"{line}\n" for line in wrap(f"{desc} \n", width=78)]
+        # furniture
+        parts["furniture"] = []
+        furniture = inv.format_item_groups(
+            inv.group_items(self, categories=["furniture"]), self, show_doing_desc=True
+        )
+        if furniture:
+            parts["furniture"] = [f"{line}\n" for line in wrap(f"{furniture}.", width=78)]
+        # items
+        parts["items"] = []
+        items = inv.format_item_groups(inv.group_items(self, exclude=["furniture"]), self)
+        if items:
+            parts["items"] = [f"{line}\n" for line in wrap(f"You see {items} on the ground.", width=78)]
+        # players/mobs and exits in one pass over the contents
+        mobs = []
+        string = "|M[ Exits:|n  "
+        for obj in self.contents:
+            kind = inv.get_kind(obj)
+            if kind == "character":
+                mobs.append(obj)
+            elif kind == "exit":
+                string += f"|W{obj.name}|n  "
+        string += "|M]|n"
+        parts["mobs"] = mobs
+        parts["exits"] = string
+
+        self.ndb.render_cache = (key, parts)
+        return parts
+
     def return_appearance(self, looker, **kwargs):
         """
         This is called when e.g. the look command wants to retrieve
@@ -344,11 +677,6 @@ class Room(DefaultRoom):
             description (str): Our description.
 
         """
-        # ensures that our description is current based on time/season
-        self.update_current_description()
-
-
-        # run the normal return_appearance method, now that desc is updated.
         mini_map = mapping.draw_mini_map(self, add_line_break=False)
         room_desc = []
         string = ""
@@ -358,104 +686,34 @@ class Room(DefaultRoom):
         #Zone
         string += f"(|Y{self.tags.get(category='zone')}|n) "
         # Time
-        gtime = datetime.fromtimestamp(gametime.gametime(absolute=True))
+        gtime = get_game_datetime()
         string += f"|w{gtime.strftime('%I:%M')}|n|W{gtime.strftime('%p').lower()}|n\n"
 
         room_desc.append(string)
         string = ""
         # Desc
-        if self.db.dark and not looker.db.nightvision:
-            characters = [char for char in self.contents if char.is_typeclass("typeclasses.characters.Character", exact=False)]
-            lit_items = []
-            location_lit = self.search(
-                True,
-                attribute_name="lit",
-                quiet=True
-            )
-            if location_lit:
-                lit_items.append(location_lit)
-
-            for character in characters:
-                character_lit = character.search(True, attribute_name="lit", quiet=True)
-                if character_lit:
-                    lit_items.append(character_lit)
-            if not lit_items:
+        if self.db.dark and not getattr(looker, "nightvision", False):
+            if not lighting.is_lit(self):
                 string += "|WIt is pitch black here. You can't make anything out.|n"
                 room_desc.append(string)
                 return unpack_description(mini_map, room_desc)
-            
-        string = ""
-        desc_string = wrap(f"{self.db.desc} \n", width=78)
-        for line in desc_string:
-            # string += (line + "\n")
-            room_desc.append(f"{line}\n")
-        # furniture
-        furniture = str(inv.list_items_clean(self, show_doing_desc=True, categories=["furniture"]))
-        if furniture:
-            furniture = f"{furniture}."
-            furniture = wrap(furniture, width=78)
-            for line in furniture:
-                # string += (line + "\n")
-                room_desc.append(f"{line}\n")
-            # string += f"{furniture}.\n"
-        # items
-        items = str(inv.list_items_clean(self, exclude=["furniture"]))
-        if items:
-            items_string = f"You see {items} on the ground."
-            items_string = wrap(items_string, width=78)
-            for line in items_string:
-                # string += (line + "\n")
-                room_desc.append(f"{line}\n")
+
+        parts = self.get_render_parts()
+        room_desc.extend(parts["desc"])
+        room_desc.extend(parts["furniture"])
+        room_desc.extend(parts["items"])
         # players/mobs
-        mob_list = [mob for mob in self.contents if mob.is_typeclass("typeclasses.characters.Character") and mob != looker]
+        mob_list = [mob for mob in parts["mobs"] if mob != looker and mob.location == self]
         if mob_list:
             for mob in mob_list:
                 string += f"|w{mob.get_display_name(looker)}|n"
             string += " is standing here.\n"
             room_desc.append(string)
         # exits
-        string = ""
-        exit_list = [exits for exits in self.contents if exits.is_typeclass("typeclasses.exits.Exit", exact=False)]
-        string += "|M[ Exits:|n  "
-        for exits in exit_list:
-            string += f"|W{exits.name}|n  "
-        string += "|M]|n"
-        room_desc.append(string)
+        room_desc.append(parts["exits"])
 
         # return super(Room, self).return_appearance(looker, **kwargs)
-        return unpack_description(mini_map, room_desc) 
-
-    def update_current_description(self):
-        """
-        This will update the description of the room if the time or season
-        has changed since last checked.
-        """
-        update = False
-        # get current time and season
-        curr_season, curr_timeslot = get_time_and_season()
-        # compare with previously stored slots
-        last_season = self.ndb.last_season
-        last_timeslot = self.ndb.last_timeslot
-        if curr_season != last_season:
-            # season changed. Load new desc, or a fallback.
-            new_raw_desc = self.attributes.get("%s_desc" % curr_season)
-            if new_raw_desc:
-                raw_desc = new_raw_desc
-            else:
-                # no seasonal desc set. Use fallback
-                raw_desc = self.db.general_desc or self.db.desc
-            self.db.raw_desc = raw_desc
-            self.ndb.last_season = curr_season
-            update = True
-        if curr_timeslot != last_timeslot:
-            # timeslot changed. Set update flag.
-            self.ndb.last_timeslot = curr_timeslot
-            update = True
-        if update:
-            # if anything changed we have to re-parse
-            # the raw_desc for time markers
-            # and re-save the description again.
-            self.db.desc = self.replace_timeslots(self.db.raw_desc, curr_timeslot)
+        return unpack_description(mini_map, room_desc)
 
 
 # Custom Look command supporting Room details. Add this to
@@ -565,8 +823,8 @@ class CmdExtendedRoomDesc(default_cmds.CmdDesc):
 
     def reset_times(self, obj):
         """By deleteting the caches we force a re-load."""
-        obj.ndb.last_season = None
-        obj.ndb.last_timeslot = None
+        if hasattr(obj, "clear_desc_cache"):
+            obj.clear_desc_cache()
 
     def func(self):
         """Define extended command"""
@@ -613,7 +871,7 @@ class CmdExtendedRoomDesc(default_cmds.CmdDesc):
                 text = self.args
                 obj = location
             obj.db.desc = text  # a compatibility fallback
-            if obj.attributes.has("general_desc"):
+            if obj.is_typeclass("typeclasses.rooms.Room", exact=False):
                 obj.db.general_desc = text
                 self.reset_times(obj)
                 caller.msg("General description was set on %s." % obj.key)
@@ -702,7 +960,7 @@ class CmdChecktime(default_cmds.MuxCommand):
     def func(self):
         """Reads time info from current room"""
         # get absolute time
-        gtime = datetime.fromtimestamp(gametime.gametime(absolute=True))
+        gtime = get_game_datetime()
 
         location = self.caller.location
         if not location:
@@ -1,5 +1,6 @@
 import datetime
 import re
+from django.conf import settings
 from evennia import gametime
 
 # set up the seasons and time slots. This assumes gametime started at the
@@ -9,16 +10,95 @@ MONTHS_PER_YEAR = 12
 SEASONAL_BOUNDARIES = (3 / 12.0, 6 / 12.0, 9 / 12.0)
 HOURS_PER_DAY = 24
 DAY_BOUNDARIES = (0, 6 / 24.0, 12 / 24.0, 18 / 24.0)
+# hours between timeslot changes. Seasons change on the first of a month
+# at midnight, so they always change together with a timeslot.
+HOURS_PER_TIMESLOT = 6
+
+
+class GameClock:
+    """
+    Works out the season and timeslot once and hands out the cached
+    values until the next timeslot boundary in game time. `epoch` goes up
+    by one every time the season or timeslot changes, so caches of
+    anything that depends on them can key on it.
+    """
+    def __init__(self):
+        self.season = None
+        self.timeslot = None
+        self.epoch = 0
+        # game timestamp of the next timeslot boundary
+        self.expires = 0
+
+    def update(self):
+        """
+        Recalculate the season and timeslot if the cached ones have run
+        out.
+        """
+        timestamp = gametime.gametime(absolute=True)
+        if timestamp < self.expires:
+            return
+        datestamp = datetime.datetime.fromtimestamp(timestamp)
+        season, timeslot = _calculate_time_and_season(datestamp)
+        if (season, timeslot) != (self.season, self.timeslot):
+            self.season, self.timeslot = season, timeslot
+            self.epoch += 1
+        start = datestamp.replace(
+            hour=datestamp.hour - datestamp.hour % HOURS_PER_TIMESLOT,
+            minute=0, second=0, microsecond=0
+        )
+        boundary = start + datetime.timedelta(hours=HOURS_PER_TIMESLOT)
+        self.expires = boundary.timestamp()
+
+    def get(self):
+        """
+        Returns:
+            clock (tuple): (season, timeslot, epoch)
+        """
+        self.update()
+        return self.season, self.timeslot, self.epoch
+
+    def seconds_until_change(self):
+        """
+        Returns:
+            seconds (float): real seconds until the timeslot changes.
+        """
+        self.update()
+        return (self.expires - gametime.gametime(absolute=True)) / settings.TIME_FACTOR
+
+
+CLOCK = GameClock()
+
 
 def get_time_and_season():
     """
-    Calculate the current time and season ids.
+    Get the current season and timeslot ids.
+    """
+    season, timeslot, epoch = CLOCK.get()
+    return season, timeslot
+
+
+def get_clock_epoch():
+    """
+    Get the id of the current season and timeslot, it goes up by one
+    every time either changes.
+    """
+    return CLOCK.get()[2]
+
+
+def get_game_datetime():
+    """
+    Get the current game time as a datetime.
+    """
+    return datetime.datetime.fromtimestamp(gametime.gametime(absolute=True))
+
+
+def _calculate_time_and_season(datestamp):
+    """
+    Calculate the season and timeslot ids of a game datetime.
     """
     # get the current time as parts of year and parts of day.
     # we assume a standard calendar here and use 24h format.
-    timestamp = gametime.gametime(absolute=True)
     # note that fromtimestamp includes the effects of server time zone!
-    datestamp = datetime.datetime.fromtimestamp(timestamp)
     season = float(datestamp.month) / MONTHS_PER_YEAR
     timeslot = float(datestamp.hour) / HOURS_PER_DAY
 
@@ -14,6 +14,7 @@ just overloads its hooks to have it perform its function.
 
 import random
 from evennia import DefaultScript
+from world import regen, vitals
 
 
 class Script(DefaultScript):
@@ -114,3 +115,18 @@ class MsgOnInterval(DefaultScript):
         rand = random.randrange(0, len(self.obj.db.msglist))
         self.obj.location.msg_contents(self.obj.db.msglist[rand])
 
+class VitalsRegen(DefaultScript):
+    """
+    Global script that regenerates the health of every hurt online
+    character in one batch and saves changed vitals. Set up through
+    GLOBAL_SCRIPTS in settings.
+    """
+    def at_script_creation(self):
+        self.key = "vitals_regen"
+        self.desc = "Regenerate the vitals of online characters"
+        self.interval = regen.REGEN_INTERVAL
+        self.persistent = True
+
+    def at_repeat(self):
+        regen.regen_tick()
+        vitals.flush()
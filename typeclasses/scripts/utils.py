@@ -6,6 +6,7 @@ Little helper tools that may oneday be split into different files.
 """
 
 import math
+from collections import OrderedDict
 
 def get_distance(p1, p2):
     return int(math.dist(p1, p2))
@@ -35,3 +36,44 @@ def get_direction(p1, p2):
         dir = 'southeast'
 
     return dir
+
+class LRUCache:
+    """
+    A small bounded cache that forgets the least recently used entry
+    when it is full. Keeps hit/miss counters for admin stats.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        try:
+            value = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self.data.pop(key, default)
+
+    def clear(self):
+        self.data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"size": len(self.data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
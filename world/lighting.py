@@ -0,0 +1,158 @@
+"""
+Lighting
+
+This module keeps track of the light sources in each room, so checking
+whether a dark room is lit does not have to search the room and
+everyone in it.
+
+A light source counts for a room if it is lying in the room or is
+carried directly by something in the room. Each room keeps the set of
+its light sources on ndb, built the first time it is needed. After that
+it is updated as objects move (the `at_object_receive`/`at_object_leave`
+hooks of rooms, characters and objects call in here) and as light
+sources are lit or put out with `set_lit`, which the `lit` property of
+`typeclasses.objects.LightSource` goes through. If `lit` is changed by
+hand, the admin command `relight` rebuilds the room with `reset`.
+
+Sets are used rather than counts since `move_to` calls the announce
+hooks, which check `is_lit`, between the leave and receive hooks. A set
+built in that gap already holds (or lacks) the object that is moving,
+adding or removing it again changes nothing. The hooks build the sets
+before changing them, so no change is lost.
+
+"""
+
+
+def _get_room(holder):
+    """
+    Get the room whose light sources include the contents of holder, or
+    None if things inside holder don't light any room.
+    """
+    if holder is None:
+        return None
+    if holder.location is None:
+        return holder
+    if holder.location.location is None:
+        return holder.location
+    return None
+
+
+def _lit_carried(obj):
+    """The lit objects directly inside obj."""
+    carried = obj.ndb.lit_carried
+    if carried is None:
+        carried = set(item for item in obj.contents if item.db.lit)
+        obj.ndb.lit_carried = carried
+    return carried
+
+
+def _light_sources(room):
+    """The light sources in the room."""
+    sources = room.ndb.light_sources
+    if sources is None:
+        sources = set()
+        for obj in room.contents:
+            if obj.db.lit:
+                sources.add(obj)
+            sources.update(_lit_carried(obj))
+        room.ndb.light_sources = sources
+    return sources
+
+
+def at_object_receive(holder, obj):
+    """
+    Update the light sources after obj has moved into holder.
+
+    Args:
+        holder (obj): the room or object obj moved into.
+        obj (obj): the object that moved.
+    """
+    if holder.location is None:
+        # holder is a room, obj brings its own light and what it carries
+        sources = _light_sources(holder)
+        if obj.db.lit:
+            sources.add(obj)
+        sources.update(_lit_carried(obj))
+        return
+    if not obj.db.lit:
+        return
+    _lit_carried(holder).add(obj)
+    room = _get_room(holder)
+    if room:
+        _light_sources(room).add(obj)
+
+
+def at_object_leave(holder, obj):
+    """
+    Update the light sources before obj leaves holder.
+
+    Args:
+        holder (obj): the room or object obj is leaving.
+        obj (obj): the object that is moving.
+    """
+    if holder.location is None:
+        sources = _light_sources(holder)
+        sources.discard(obj)
+        sources.difference_update(_lit_carried(obj))
+        return
+    if not obj.db.lit:
+        return
+    _lit_carried(holder).discard(obj)
+    room = _get_room(holder)
+    if room:
+        _light_sources(room).discard(obj)
+
+
+def is_lit(room):
+    """
+    Check if there is any light source in a room.
+
+    Args:
+        room (obj): the room to check.
+
+    Returns:
+        lit (bool): True if something in the room gives off light.
+    """
+    return bool(_light_sources(room))
+
+
+def set_lit(obj, lit=True):
+    """
+    Light or put out a light source. Use this rather than setting
+    `db.lit` directly so the rooms' light sources stay correct.
+
+    Args:
+        obj (obj): the light source.
+        lit (bool, optional): whether it should be lit.
+    """
+    lit = bool(lit)
+    if bool(obj.db.lit) == lit:
+        return
+    obj.db.lit = lit
+    holder = obj.location
+    if holder is None:
+        return
+    sets = []
+    if holder.location is not None:
+        sets.append(_lit_carried(holder))
+    room = _get_room(holder)
+    if room:
+        sets.append(_light_sources(room))
+    for sources in sets:
+        if lit:
+            sources.add(obj)
+        else:
+            sources.discard(obj)
+
+
+def reset(room):
+    """
+    Forget the light sources of a room and the things in it, e.g.
+    after `lit` was changed by hand with `set`.
+
+    Args:
+        room (obj): the room to rebuild.
+    """
+    room.ndb.light_sources = None
+    for obj in room.contents:
+        obj.ndb.lit_carried = None
@@ -4,35 +4,175 @@ Mapping
 This mmodule contains methods and classes that handle
 displaying the in-game map.
 
+Rooms are kept in an in-memory zone index so drawing the map does
+not have to search and load every room in the zone. A zone is loaded
+the first time it is drawn, and kept up to date with `update_room`
+and `remove_room` when rooms are created, moved, re-tagged or deleted.
+
+Rendered minimaps are cached per (room, width, height). Each zone has a
+version number that is bumped whenever one of its rooms changes, which
+invalidates every cached map of that zone.
+
 """
 from evennia import search_tag
+from typeclasses.scripts.utils import LRUCache
 
 DEFAULT_SYMBOL = "|[Y[]|n"
 DEFAULT_EMPTY_SYMBOL = "|b||_|n"
 DEFAULT_PLAYER_SYMBOL = "|[c|R()|n"
 
+# {zone_tag: {(x, y, z): {"room": room, "name": name, "symbol": symbol}}}
+_ZONE_INDEX = {}
+# {room id: (zone_tag, (x, y, z))}, used to find a room's old entry
+_ROOM_INDEX = {}
+# {zone_tag: version}, bumped on every change to a zone
+_ZONE_VERSIONS = {}
+# {(room id, width, height, add_line_break): ((zone_tag, zone version), rows)}
+MAP_CACHE_SIZE = 2048
+_MAP_CACHE = LRUCache(MAP_CACHE_SIZE)
+
+
+def _bump_zone(zone_tag):
+    _ZONE_VERSIONS[zone_tag] = _ZONE_VERSIONS.get(zone_tag, 0) + 1
+
+
+def _room_entry(room):
+    return {"room": room,
+            "name": room.name,
+            "symbol": room.attributes.get("symbol", DEFAULT_SYMBOL)}
+
+
+def _room_coords(room):
+    return (room.db.x or 0, room.db.y or 0, room.db.z or 0)
+
+
+def _load_zone(zone_tag):
+    zone = {}
+    for room in search_tag(zone_tag, category="zone"):
+        coords = _room_coords(room)
+        zone[coords] = _room_entry(room)
+        _ROOM_INDEX[room.id] = (zone_tag, coords)
+    _ZONE_INDEX[zone_tag] = zone
+    return zone
+
+
+def get_zone(zone_tag):
+    """
+    Get the index of a zone, loading it from the database on first use.
+
+    Args:
+        zone_tag (str): the zone tag (category "zone") of the rooms.
+
+    Returns:
+        zone (dict): mapping of (x, y, z) to room entries.
+    """
+    if not zone_tag:
+        return {}
+    zone = _ZONE_INDEX.get(zone_tag)
+    if zone is None:
+        zone = _load_zone(zone_tag)
+    return zone
+
+
+def locate_room(room):
+    """
+    Find the zone and coordinates of a room.
+
+    Args:
+        room (obj): the room to locate.
+
+    Returns:
+        location (tuple): (zone_tag, (x, y, z)). zone_tag is None if
+            the room is not part of a zone.
+    """
+    entry = _ROOM_INDEX.get(room.id)
+    if entry:
+        return entry
+    zone_tag = room.tags.get(category="zone")
+    if zone_tag and zone_tag not in _ZONE_INDEX:
+        _load_zone(zone_tag)
+        entry = _ROOM_INDEX.get(room.id)
+        if entry:
+            return entry
+    return (zone_tag, _room_coords(room))
+
+
+def remove_room(room):
+    """
+    Remove a room from the zone index.
+
+    Args:
+        room (obj): the room to remove.
+    """
+    entry = _ROOM_INDEX.pop(room.id, None)
+    if not entry:
+        return
+    zone_tag, coords = entry
+    zone = _ZONE_INDEX.get(zone_tag)
+    if zone and coords in zone and zone[coords]["room"] is room:
+        del zone[coords]
+    _bump_zone(zone_tag)
+
+
+def update_room(room):
+    """
+    Re-index a room. Call this after a room has been created, has had
+    its coordinates, zone tag, name or symbol changed. Rooms do it in
+    `basetype_posthook_setup` once their creation tags are added, and
+    in `set_coords`, `set_zone` and `set_symbol`.
+
+    Args:
+        room (obj): the room to re-index.
+    """
+    remove_room(room)
+    zone_tag = room.tags.get(category="zone")
+    # zones that are not loaded yet will pick the room up when they are
+    if not zone_tag or zone_tag not in _ZONE_INDEX:
+        return
+    coords = _room_coords(room)
+    _ZONE_INDEX[zone_tag][coords] = _room_entry(room)
+    _ROOM_INDEX[room.id] = (zone_tag, coords)
+    _bump_zone(zone_tag)
+
+
+def rebuild_index():
+    """
+    Drop the whole zone index and the rendered map cache. Zones are
+    reloaded the next time they are drawn.
+    """
+    _ZONE_INDEX.clear()
+    _ROOM_INDEX.clear()
+    _MAP_CACHE.clear()
+    for zone_tag in _ZONE_VERSIONS:
+        _bump_zone(zone_tag)
+
+
+def index_stats():
+    """
+    Returns:
+        stats (dict): number of loaded zones and indexed rooms, and the
+            rendered map cache stats.
+    """
+    return {"zones": len(_ZONE_INDEX),
+            "rooms": len(_ROOM_INDEX),
+            "cache": _MAP_CACHE.stats()}
+
+
 def draw_mini_map(location,add_line_break=True, width=3, height=3):
-    # coords = (location.attributes.get("x", 0), location.attributes.get("y", 0))
-    coords = (location.db.x, location.db.y)
-    zone_tag = location.tags.get(category="zone")
-    rooms = search_tag(zone_tag, category="zone")
-    map_dict = {}
+    zone_tag, (loc_x, loc_y, loc_z) = locate_room(location)
+    # versions are counted per zone, a room that moved to another zone
+    # must not match a version number of its old one
+    version = (zone_tag, _ZONE_VERSIONS.get(zone_tag, 0))
+    cache_key = (location.id, width, height, add_line_break)
+    cached = _MAP_CACHE.get(cache_key)
+    if cached and cached[0] == version:
+        return list(cached[1])
+
+    zone = get_zone(zone_tag)
+    coords = (loc_x, loc_y)
     string = ""
     string_list = []
 
-    # map room attributes to dictionary
-    for room in rooms:
-        # only take room data from the same floor as the player
-        if room.db.z != location.db.z:
-            continue
-
-        room_x = room.attributes.get("x")
-        room_y = room.attributes.get("y")
-        room_symbol = room.attributes.get("symbol", DEFAULT_SYMBOL)
-
-        map_dict[(room_x, room_y)] = {"name":room.name,
-                                      "symbol":room_symbol}
-    
     for y in reversed(range(coords[1] - (height - 1), coords[1] + height)):
         for x in range(coords[0] - (width -1), coords[0] + width):
             # if this is where the player is located, draw the player symbol
@@ -40,15 +180,17 @@ def draw_mini_map(location,add_line_break=True, width=3, height=3):
                 string += DEFAULT_PLAYER_SYMBOL
                 continue
             # fill the string with the default symbol if the coords dont exist
-            # in the current zone
-            if (x, y) not in map_dict.keys():
+            # in the current zone (only rooms on the player's floor are drawn)
+            room = zone.get((x, y, loc_z))
+            if not room:
                 string += DEFAULT_EMPTY_SYMBOL
                 continue
-            string += map_dict[(x, y)]["symbol"]
+            string += room["symbol"]
 
         if add_line_break: string += "\n"
         string_list.append(string)
         string = ""
     string_list.append("          ")
 
-    return string_list
+    _MAP_CACHE.set(cache_key, (version, string_list))
+    return list(string_list)
@@ -0,0 +1,140 @@
+"""
+Movement
+
+A single scheduler for delayed movement. Instead of every step of
+every moving character creating its own reactor timer, pending
+traversals are kept as small records in a heap. One looping call,
+running only while something is pending, runs all moves that are due
+in the same tick as a batch.
+
+"""
+import heapq
+import itertools
+import time
+from twisted.internet import task
+from evennia.utils import logger
+
+# seconds between scheduler ticks
+TICK_RATE = 0.25
+
+
+class MoveRecord:
+    """
+    A pending move. Stored on the traveller as `ndb.currently_moving`,
+    with the same `called`/`cancel()` interface as a deferred call.
+    `called` is True once the move has run or was cancelled, callers
+    check it to see if the traveller is still moving.
+    """
+    __slots__ = ("due", "traveller", "callback", "called", "cancelled")
+
+    def __init__(self, due, traveller, callback):
+        self.due = due
+        self.traveller = traveller
+        self.callback = callback
+        self.called = False
+        self.cancelled = False
+
+    def cancel(self):
+        if not self.called and not self.cancelled:
+            self.cancelled = True
+            # a cancelled move is finished, the traveller can move again
+            self.called = True
+            SCHEDULER.cancelled += 1
+
+
+class MovementScheduler:
+    def __init__(self):
+        # (due time, sequence, record)
+        self.heap = []
+        self.sequence = itertools.count()
+        self.cancelled = 0
+        self.loop = None
+        # stats
+        self.moves = 0
+        self.batches = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.avg_lag = 0.0
+
+    def schedule(self, traveller, delay, callback):
+        """
+        Run callback after delay seconds.
+
+        Args:
+            traveller (obj): the object that is moving.
+            delay (float): seconds until the move happens.
+            callback (callable): called without arguments to do the move.
+
+        Returns:
+            record (MoveRecord): the pending move, can be cancelled.
+        """
+        record = MoveRecord(time.time() + delay, traveller, callback)
+        heapq.heappush(self.heap, (record.due, next(self.sequence), record))
+        if not self.loop or not self.loop.running:
+            self.loop = task.LoopingCall(self.tick)
+            self.loop.start(TICK_RATE, now=False)
+        return record
+
+    def tick(self):
+        """Run every move that is due."""
+        now = time.time()
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            record = heapq.heappop(self.heap)[2]
+            if record.cancelled:
+                self.cancelled -= 1
+                continue
+            due.append(record)
+
+        moves = 0
+        for record in due:
+            if record.cancelled:
+                # cancelled by a move earlier in this batch
+                self.cancelled -= 1
+                continue
+            record.called = True
+            moves += 1
+            lag = now - record.due
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.avg_lag += (lag - self.avg_lag) * 0.05
+            try:
+                record.callback()
+            except Exception:
+                logger.log_trace(f"Movement of {record.traveller} failed.")
+        if moves:
+            self.moves += moves
+            self.batches += 1
+
+        if not self.heap and self.loop and self.loop.running:
+            self.loop.stop()
+
+    def stats(self):
+        """
+        Returns:
+            stats (dict): pending moves, moves run, batches and lag.
+        """
+        return {"pending": len(self.heap) - self.cancelled,
+                "moves": self.moves,
+                "batches": self.batches,
+                "last_lag": self.last_lag,
+                "avg_lag": self.avg_lag,
+                "max_lag": self.max_lag}
+
+
+SCHEDULER = MovementScheduler()
+
+
+def schedule_move(traveller, delay, callback):
+    """
+    Schedule a delayed move with the movement scheduler.
+
+    Args:
+        traveller (obj): the object that is moving.
+        delay (float): seconds until the move happens.
+        callback (callable): called without arguments to do the move.
+
+    Returns:
+        record (MoveRecord): the pending move, can be cancelled.
+    """
+    return SCHEDULER.schedule(traveller, delay, callback)
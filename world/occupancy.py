@@ -0,0 +1,113 @@
+"""
+Occupancy
+
+Keeps track of which rooms have connected players in them, per zone,
+so broadcasts and ambient effects can skip empty rooms.
+
+A listener is a puppeted character. Characters are added when puppeted,
+removed when unpuppeted and moved along with `move_listener` after they
+move. After a reload the index is rebuilt from the connected sessions
+the first time it is used.
+
+"""
+import evennia
+from world import mapping
+
+# {zone_tag: {room: number of listeners}}
+_OCCUPIED = {}
+# {character id: (zone_tag, room)}
+_LISTENERS = {}
+_LOADED = False
+
+
+def _load():
+    global _LOADED
+    _LOADED = True
+    for session in evennia.SESSION_HANDLER.get_sessions():
+        puppet = session.puppet
+        if puppet and puppet.id not in _LISTENERS:
+            add_listener(puppet)
+
+
+def _add(character, room):
+    zone_tag = mapping.locate_room(room)[0]
+    rooms = _OCCUPIED.setdefault(zone_tag, {})
+    rooms[room] = rooms.get(room, 0) + 1
+    _LISTENERS[character.id] = (zone_tag, room)
+
+
+def add_listener(character):
+    """
+    Start tracking a character, e.g. when it is puppeted.
+
+    Args:
+        character (obj): the character.
+    """
+    if character.id in _LISTENERS:
+        remove_listener(character)
+    if character.location:
+        _add(character, character.location)
+    else:
+        _LISTENERS[character.id] = (None, None)
+
+
+def remove_listener(character):
+    """
+    Stop tracking a character, e.g. when it is unpuppeted.
+
+    Args:
+        character (obj): the character.
+    """
+    zone_tag, room = _LISTENERS.pop(character.id, (None, None))
+    if room is None:
+        return
+    rooms = _OCCUPIED.get(zone_tag, {})
+    if rooms.get(room, 0) <= 1:
+        rooms.pop(room, None)
+        if not rooms:
+            _OCCUPIED.pop(zone_tag, None)
+    else:
+        rooms[room] -= 1
+
+
+def move_listener(character):
+    """
+    Update a tracked character's room after it has moved. Characters
+    that are not tracked are ignored.
+
+    Args:
+        character (obj): the character.
+    """
+    if character.id not in _LISTENERS:
+        return
+    remove_listener(character)
+    if character.location:
+        _add(character, character.location)
+    else:
+        _LISTENERS[character.id] = (None, None)
+
+
+def occupied_rooms(zone_tag):
+    """
+    Get the rooms in a zone that have connected players in them.
+
+    Args:
+        zone_tag (str): the zone.
+
+    Returns:
+        rooms (dict): {room: number of listeners}.
+    """
+    if not _LOADED:
+        _load()
+    return _OCCUPIED.get(zone_tag, {})
+
+
+def heatmap():
+    """
+    Returns:
+        heatmap (dict): {zone_tag: {room: number of listeners}} for
+            every zone with connected players in it.
+    """
+    if not _LOADED:
+        _load()
+    return _OCCUPIED
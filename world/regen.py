@@ -0,0 +1,92 @@
+"""
+Regen
+
+Health regeneration for every online character, run in one batch by
+the global `vitals_regen` script instead of one ticker per character.
+
+Only characters below their max health are kept in the regen set. They
+are added when their health drops or when they are puppeted, and
+dropped once they are healed or go offline. After a reload the set is
+rebuilt from the connected sessions on the first tick.
+
+"""
+import evennia
+
+REGEN_INTERVAL = 30
+REGEN_AMOUNT = 2
+
+# characters that are below their max health
+_REGENERATING = set()
+_LOADED = False
+
+
+def _load():
+    global _LOADED
+    _LOADED = True
+    for session in evennia.SESSION_HANDLER.get_sessions():
+        if session.puppet:
+            update(session.puppet)
+
+
+def update(character):
+    """
+    Add a character to the regen set if it is hurt, remove it if not.
+    Called whenever its health changes.
+
+    Args:
+        character (obj): the character.
+    """
+    if character.health < character.health_max:
+        _REGENERATING.add(character)
+    else:
+        _REGENERATING.discard(character)
+
+
+def remove(character):
+    """
+    Stop regenerating a character, e.g. when it goes offline.
+
+    Args:
+        character (obj): the character.
+    """
+    _REGENERATING.discard(character)
+
+
+def regen_tick():
+    """
+    Heal every hurt online character by REGEN_AMOUNT. Each character's
+    health is written once and it gets one status message.
+
+    Returns:
+        healed (int): how many characters were healed.
+    """
+    if not _LOADED:
+        _load()
+    healed = 0
+    for character in list(_REGENERATING):
+        if not character.has_account:
+            _REGENERATING.discard(character)
+            continue
+        health, health_max = character.health, character.health_max
+        amount = min(REGEN_AMOUNT, health_max - health)
+        if amount <= 0:
+            _REGENERATING.discard(character)
+            continue
+        # anything sent while healing goes out with the status message
+        character.start_output_buffer()
+        try:
+            # the health setter drops the character once it is healed
+            character.health = health + amount
+            character.msg(f"|gHealth changed by {amount}.|n Current health: {health + amount} / {health_max}")
+        finally:
+            character.stop_output_buffer()
+        healed += 1
+    return healed
+
+
+def regen_count():
+    """
+    Returns:
+        count (int): how many characters are regenerating.
+    """
+    return len(_REGENERATING)
@@ -4,24 +4,168 @@ Rules
 This module contains methods and classes that handle the games
 rule system.
 
+Effects are given as a dict, e.g. on `Consumable.db.effects`, and are
+compiled once into a list of operations:
+
+    {"health": 5}                  change a vital (health, thirst, ...)
+    {"poisoned": True}             set an Attribute (bools and text)
+    {"drunk": 2}                   add to a number Attribute
+    {"nightvision": True}          character properties like nightvision
+                                   are set through the property
+    {"full_heal": []}              call a character method with arguments
+    {"nightvision": {"value": True, "duration": 60}}
+                                   any of the above, undone after
+                                   duration seconds
+
+Only vitals, character properties and methods, and the Attributes in
+`EFFECT_ATTRIBUTES` can be affected, anything else (like a misspelled
+"helth") is reported as an error when the effects are compiled.
+
 """
+from django.conf import settings
+from django.db import transaction
+from evennia import utils
+from evennia.utils import logger
+from world.vitals import VITALS
 
-def apply_effects(effects, character):
+# character Attributes that effects may change
+EFFECT_ATTRIBUTES = {"poisoned", "drunk"}
+
+_CHARACTER_CLASS = None
+
+
+def _get_character_class():
+    global _CHARACTER_CLASS
+    if _CHARACTER_CLASS is None:
+        _CHARACTER_CLASS = utils.class_from_module(settings.BASE_CHARACTER_TYPECLASS)
+    return _CHARACTER_CLASS
+
+
+def _compile_effect(effect, value):
     """
-    Takes an input dict and runs through it, apply effects on a chracter
+    Compile a single effect, returns (op, error).
+    """
+    if effect in VITALS:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None, f"vital '{effect}' needs a number, got {value!r}"
+        return ("vital", effect, value), None
+    if isinstance(value, (list, tuple)):
+        if not callable(getattr(_get_character_class(), effect, None)):
+            return None, f"'{effect}' is not a character method"
+        return ("call", effect, tuple(value)), None
+    number = isinstance(value, (int, float)) and not isinstance(value, bool)
+    prop = getattr(_get_character_class(), effect, None)
+    if isinstance(prop, property):
+        if prop.fset is None:
+            return None, f"'{effect}' can't be set"
+        return ("prop_delta" if number else "prop_set", effect, value), None
+    if effect not in EFFECT_ATTRIBUTES:
+        return None, f"unknown effect '{effect}'"
+    return ("delta" if number else "set", effect, value), None
+
+
+def compile_effects(effects):
+    """
+    Compile an effects dict into operations that can be applied with
+    `apply_ops`.
 
     Args:
-        effects (dict): 
-        character (obj):
-    """
-    for effect, value in effects.items():
-        if character.attributes.has(effect):
-            stat = character.attributes.get(effect, return_obj=True)
-            if stat == type(bool):
-                stat = value
-                continue
-            stat += value
+        effects (dict): the effects, see the module docstring.
+
+    Returns:
+        ops (tuple): the compiled operations, unknown effects are left out.
+        errors (list): a message for each effect that could not be compiled.
+    """
+    ops = []
+    errors = []
+    for effect, value in (effects or {}).items():
+        duration = None
+        if isinstance(value, dict):
+            duration = value.get("duration")
+            value = value.get("value")
+        op, error = _compile_effect(effect, value)
+        if error:
+            errors.append(error)
             continue
-        getattr(character, effect)(*value)
-        
-        
+        if duration:
+            if op[0] == "call":
+                errors.append(f"'{effect}' is a method call and can't be timed")
+                continue
+            op = ("timed", op, duration)
+        ops.append(op)
+    return tuple(ops), errors
+
+
+def _apply_op(op, character):
+    """
+    Apply a single operation, returns the operation that undoes it.
+    """
+    kind, name, value = op
+    if kind == "vital":
+        if name == "health":
+            # goes through the health property for death and regen
+            character.health += value
+        else:
+            character.vitals.change(name, value)
+        return ("vital", name, -value)
+    if kind == "delta":
+        old_value = character.attributes.get(name, 0)
+        character.attributes.add(name, old_value + value)
+        return ("delta", name, -value)
+    if kind == "set":
+        old_value = character.attributes.get(name)
+        if value is None:
+            character.attributes.remove(name)
+        else:
+            character.attributes.add(name, value)
+        return ("set", name, old_value)
+    if kind == "prop_delta":
+        setattr(character, name, getattr(character, name) + value)
+        return ("prop_delta", name, -value)
+    if kind == "prop_set":
+        old_value = getattr(character, name)
+        setattr(character, name, value)
+        return ("prop_set", name, old_value)
+    getattr(character, name)(*value)
+    return None
+
+
+def _undo_op(op, character):
+    if character.pk:
+        with transaction.atomic():
+            _apply_op(op, character)
+
+
+def apply_ops(ops, character):
+    """
+    Apply compiled effects to a character, all Attribute changes are
+    saved in one transaction.
+
+    Args:
+        ops (tuple): operations from `compile_effects`.
+        character (obj): the character.
+    """
+    with transaction.atomic():
+        for op in ops:
+            if op[0] == "timed":
+                undo = _apply_op(op[1], character)
+                # persistent, so the effect still ends after a reload
+                utils.delay(op[2], _undo_op, undo, character, persistent=True)
+            else:
+                _apply_op(op, character)
+
+
+def apply_effects(effects, character):
+    """
+    Takes an input dict and runs through it, apply effects on a chracter.
+    Compiles the effects every call, use `compile_effects` and
+    `apply_ops` for effects that are applied more than once.
+
+    Args:
+        effects (dict): the effects, see the module docstring.
+        character (obj): the character.
+    """
+    ops, errors = compile_effects(effects)
+    for error in errors:
+        logger.log_warn(f"Bad effect on {character.key}: {error}")
+    apply_ops(ops, character)
@@ -0,0 +1,100 @@
+"""
+Sound
+
+Loud sounds that carry to other rooms in the same zone, as planned in
+docs/todo.md. A sound's volume sets how many rooms away it can be
+heard. Listeners hear where it came from ("Below you to the distant
+north you hear ...") and louder sounds get more emphasis.
+
+Room coordinates come from the zone index in world/mapping.py and the
+rooms to visit from the occupancy index in world/occupancy.py, so a
+sound only costs time for rooms that have listeners in them. Distances
+and directions are cached per offset.
+
+"""
+import math
+from world import mapping, occupancy
+from typeclasses.scripts.utils import get_direction
+
+# how many rooms away a sound carries per point of volume
+RANGE_PER_VOLUME = 1
+# loudness (volume minus distance) at which the sound is shouted in caps
+VERY_LOUD = 6
+
+# {(dx, dy, dz): (distance, direction)}
+_VECTORS = {}
+
+
+def get_vector(dx, dy, dz):
+    """
+    Get the distance and the direction a sound is heard from for a
+    listener offset (dx, dy, dz) from the sound. Cached per offset.
+
+    Returns:
+        vector (tuple): (distance, direction), direction is None if the
+            listener is straight above or below.
+    """
+    vector = _VECTORS.get((dx, dy, dz))
+    if vector is None:
+        distance = math.sqrt(dx * dx + dy * dy + dz * dz)
+        # the sound comes from the opposite way of the offset
+        direction = get_direction((0, 0), (dx, dy)) if (dx or dy) else None
+        vector = (distance, direction)
+        _VECTORS[(dx, dy, dz)] = vector
+    return vector
+
+
+def describe_origin(dz, distance, direction, radius):
+    """
+    Describe where a sound is heard from, e.g. "Below you to the distant north".
+    """
+    far = distance > radius / 2
+    pieces = []
+    if dz:
+        # a positive dz means the listener is above the sound
+        vertical = "below you" if dz > 0 else "above you"
+        pieces.append(f"far {vertical}" if abs(dz) > 1 else vertical)
+    if direction and direction != "none":
+        pieces.append(f"to the distant {direction}" if far else f"to the {direction}")
+    if not pieces:
+        return "Nearby"
+    string = " ".join(pieces)
+    return string[0].upper() + string[1:]
+
+
+def emit_sound(origin, sound, volume):
+    """
+    Send a sound to the rooms around origin that are in earshot. The
+    origin room itself is left to the caller.
+
+    Args:
+        origin (obj): the room the sound is made in.
+        sound (str): what is heard, e.g. 'someone yell, "Help!"'.
+        volume (int): how loud the sound is.
+
+    Returns:
+        rooms (int): how many rooms heard the sound.
+    """
+    zone_tag, (x, y, z) = mapping.locate_room(origin)
+    radius = int(volume * RANGE_PER_VOLUME)
+    heard = 0
+    # only rooms with connected players in them are visited
+    for room in list(occupancy.occupied_rooms(zone_tag)):
+        if room is origin:
+            continue
+        room_x, room_y, room_z = mapping.locate_room(room)[1]
+        dz = room_z - z
+        distance, direction = get_vector(room_x - x, room_y - y, dz)
+        if distance > radius:
+            continue
+        loudness = volume - distance
+        where = describe_origin(dz, distance, direction, radius)
+        if where.endswith("you"):
+            where += ","
+        message = f"{where} you hear {sound}"
+        message += "!" * max(1, int(loudness) // 2) if loudness >= 2 else "."
+        if loudness >= VERY_LOUD:
+            message = message.upper()
+        room.msg_contents(message)
+        heard += 1
+    return heard
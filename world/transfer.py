@@ -0,0 +1,298 @@
+"""
+Transfer
+
+Moves many objects at once for get, drop and put. The whole batch is
+checked before anything moves (for put that includes fitting it into the
+container's free space), the moves happen in one transaction and the
+character and the room get one message each for the batch, e.g.
+"Tom gets 37 items, including 3 apples, a rope and a lantern."
+
+A count can be given ("get 5 arrows"). A stack is split and only that
+many items move, of other objects up to that many with the same name
+are taken, see `select_items`.
+
+"""
+import re
+from collections import OrderedDict
+from django.db import transaction
+from evennia.utils import list_to_string
+import typeclasses.rooms as rooms
+
+# how many kinds of items a message names before summing them up
+SUMMARY_NAMES = 3
+RE_COUNT = re.compile(r"^(\d+)\s+(.+)$")
+
+
+def parse_count(text):
+    """
+    Split a leading count off an item name, e.g. "5 arrows".
+
+    Returns:
+        count (int or None): the count, if one was given.
+        name (str): the rest of the text.
+    """
+    match = RE_COUNT.match(text.strip()) if text else None
+    if match:
+        return int(match.group(1)), match.group(2)
+    return None, text
+
+
+def _count(obj):
+    return obj.get_count() if hasattr(obj, "get_count") else 1
+
+
+def _take(obj, count):
+    """
+    Split count items off a stack, other objects are taken whole.
+    """
+    if count and hasattr(obj, "split"):
+        return obj.split(count)
+    return obj
+
+
+def _put_back(obj, taken):
+    """
+    Merge items split off obj by `_take` back into it, after they
+    failed to move.
+    """
+    count = obj.get_count() + taken.get_count()
+    taken.delete()
+    obj.set_count(count)
+
+
+def select_items(objs, count=None):
+    """
+    Pick what a get, drop or put without /all works on from the
+    matches of a search.
+
+    Args:
+        objs (list): the matching objects, best match first.
+        count (int, optional): how many items were asked for.
+
+    Returns:
+        objs (list): the first match. With a count, up to count objects
+            named like the first match, unless it is a stack, which is
+            split when it moves.
+    """
+    first = objs[0]
+    if not count or getattr(first, "is_stackable", False):
+        return [first]
+    return [obj for obj in objs if obj.key == first.key][:count]
+
+
+def describe_items(objs, looker, counts=None):
+    """
+    Describe a batch of objects for a message, grouping objects with the
+    same name.
+
+    Args:
+        objs (list): the objects.
+        looker (obj): who the names are for.
+        counts (list, optional): how many items each object stood for,
+            by default their current count.
+
+    Returns:
+        description (str): e.g. "|w3 apples|n and |wa rope|n", or
+            "37 items, including ..." for batches with many kinds of items.
+    """
+    if counts is None:
+        counts = [_count(obj) for obj in objs]
+    groups = OrderedDict()
+    for obj, count in zip(objs, counts):
+        group = groups.setdefault(obj.key, [0, obj])
+        group[0] += count
+    names = []
+    # the most common items first
+    for count, obj in sorted(groups.values(), key=lambda group: -group[0]):
+        if count == 1:
+            names.append(f"|w{obj.get_numbered_name(1, looker)[0]}|n")
+        else:
+            names.append(f"|w{obj.get_numbered_name(count, looker)[1]}|n")
+    if len(names) <= SUMMARY_NAMES:
+        return list_to_string(names)
+    total = sum(count for count, obj in groups.values())
+    return f"{total} items, including {list_to_string(names[:SUMMARY_NAMES])}"
+
+
+def _move_all(objs, destination, count=None):
+    """
+    Move objs to destination. With a count, only that many items are
+    split off each stack and moved, a split that fails to move is
+    merged back into its stack.
+
+    The database writes of all the moves are committed together, which
+    is what the transaction is for. It doesn't undo anything, the moves
+    that succeeded stand when others fail.
+
+    Returns:
+        moved (list): the objects that were moved.
+        counts (list): how many items each moved object stood for. They
+            are read before the move, a stack that arrives merges with
+            the stack already there.
+        failed (list): the objects that refused to move.
+    """
+    moved = []
+    counts = []
+    failed = []
+    with transaction.atomic():
+        for obj in objs:
+            taken = _take(obj, count)
+            taken_count = _count(taken)
+            if taken.move_to(destination, quiet=True):
+                moved.append(taken)
+                counts.append(taken_count)
+            else:
+                if taken is not obj:
+                    _put_back(obj, taken)
+                failed.append(obj)
+    return moved, counts, failed
+
+
+def _report(caller, moved, counts, self_msg, room_msg, mapping, mapping_dark):
+    """
+    Send the one message for the batch to the caller and the room.
+    """
+    items = describe_items(moved, caller, counts)
+    caller.msg(self_msg.replace("{items}", items))
+    mapping["{items}"] = items
+    single = sum(counts) == 1
+    mapping_dark["{items}"] = "|wsomething|n" if single else "|wseveral things|n"
+    rooms.dark_aware_msg(room_msg, caller.location, mapping, mapping_dark, caller)
+
+
+def get_items(caller, objs, container=None, count=None):
+    """
+    Pick up objects from the caller's location or a container.
+
+    Args:
+        caller (obj): the character picking them up.
+        objs (list): the objects.
+        container (obj, optional): the container they are taken out of.
+        count (int, optional): how many to take from each stack.
+
+    Returns:
+        moved (list): the objects that were picked up.
+    """
+    errors = []
+    batch = []
+    for obj in objs:
+        if obj == caller:
+            errors.append("You can't get yourself.")
+        elif not obj.access(caller, "get"):
+            errors.append(obj.db.get_err_msg or f"You can't get |w{obj.name}|n.")
+        elif obj.at_before_get(caller):
+            batch.append(obj)
+    moved, counts, failed = _move_all(batch, caller, count)
+    errors.extend(f"|w{obj.name}|n can't be picked up." for obj in failed)
+    for error in OrderedDict.fromkeys(errors):
+        caller.msg(error)
+    if not moved:
+        return moved
+
+    for obj in moved:
+        obj.at_get(caller)
+    container_msg = f" from |w{container.name}|n" if container else ""
+    container_msg_dark = " from |wsomething else|n" if container else ""
+    _report(
+        caller, moved, counts,
+        "You get {items}" + container_msg + ".",
+        "|w{character}|n gets {items}{container_msg}.",
+        {"{character}": caller.name, "{container_msg}": container_msg},
+        {"{character}": "Someone", "{container_msg}": container_msg_dark},
+    )
+    return moved
+
+
+def drop_items(caller, objs, count=None):
+    """
+    Drop objects from the caller's inventory into its location.
+
+    Args:
+        caller (obj): the character dropping them.
+        objs (list): the objects.
+        count (int, optional): how many to drop from each stack.
+
+    Returns:
+        moved (list): the objects that were dropped.
+    """
+    errors = []
+    batch = []
+    for obj in objs:
+        if obj.db.worn:
+            errors.append(f"|w{obj.name}|n is worn. |wRemove|n it before dropping.")
+        elif obj.at_before_drop(caller):
+            batch.append(obj)
+    moved, counts, failed = _move_all(batch, caller.location, count)
+    errors.extend(f"|w{obj.name}|n couldn't be dropped." for obj in failed)
+    for error in OrderedDict.fromkeys(errors):
+        caller.msg(error)
+    if not moved:
+        return moved
+
+    for obj in moved:
+        obj.at_drop(caller)
+    _report(
+        caller, moved, counts,
+        "You drop {items}.",
+        "|w{character}|n drops {items}.",
+        {"{character}": caller.name},
+        {"{character}": "Someone"},
+    )
+    return moved
+
+
+def put_items(caller, objs, container, count=None):
+    """
+    Put objects from the caller's inventory into a container. Objects are
+    fitted into the container's free space in order, the ones that don't
+    fit stay where they are.
+
+    Args:
+        caller (obj): the character putting them.
+        objs (list): the objects.
+        container (obj): the container.
+        count (int, optional): how many to put from each stack.
+
+    Returns:
+        moved (list): the objects that were put in the container.
+    """
+    errors = []
+    too_big = []
+    batch = []
+    reduction = container.db.mass_reduction
+    free_space = container.db.capacity - container.get_contents_mass()
+    for obj in objs:
+        if obj == caller:
+            errors.append("You can't put yourself in a container!")
+            continue
+        if obj == container:
+            errors.append(f"You can't put {container.name} in itself.")
+            continue
+        mass = obj.get_mass_modified(reduction)
+        if count and count < _count(obj):
+            mass = mass / _count(obj) * count
+        if mass > free_space:
+            too_big.append(obj)
+            continue
+        if obj.at_before_get(caller):
+            free_space -= mass
+            batch.append(obj)
+    if too_big:
+        names = list_to_string([obj.name for obj in too_big])
+        errors.append(f"There is not enough room in {container.name} to fit {names}")
+    moved, counts, failed = _move_all(batch, container, count)
+    if failed:
+        errors.append("This can't be put in a container.")
+    for error in OrderedDict.fromkeys(errors):
+        caller.msg(error)
+    if not moved:
+        return moved
+
+    _report(
+        caller, moved, counts,
+        "You put {items} into |w" + container.name + "|n.",
+        "|w{character}|n puts {items} into {container_name}.",
+        {"{character}": caller.name, "{container_name}": f"|w{container}|n"},
+        {"{character}": "Someone", "{container_name}": "|wsomething else|n"},
+    )
+    return moved
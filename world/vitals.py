@@ -0,0 +1,103 @@
+"""
+Vitals
+
+Keeps a character's health, thirst, hunger and sanity in memory, so
+reading and changing them doesn't go through the `vitals` Attribute
+every time. Changed vitals are written back to the Attribute in
+batches by `flush`, which the `vitals_regen` script calls every tick
+and the server calls when it stops.
+
+Characters get a handler as `character.vitals`.
+
+"""
+from django.db import transaction
+
+VITALS = ("health", "thirst", "hunger", "sanity")
+DEFAULT_VITALS = {"health": 10, "health_max": 10,
+                  "thirst": 0, "thirst_max": 500,
+                  "hunger": 0, "hunger_max": 500,
+                  "sanity": 1000, "sanity_max": 1000}
+
+# handlers with changes that are not saved yet
+_DIRTY = set()
+
+
+class VitalsHandler:
+    """
+    Handler for a character's vitals. Values are kept between 0 and
+    their max.
+    """
+    def __init__(self, obj):
+        self.obj = obj
+        self.values = dict(DEFAULT_VITALS)
+        stored = obj.attributes.get("vitals")
+        if stored:
+            self.values.update(
+                (key, value) for key, value in stored.items() if value is not None
+            )
+        for name in VITALS:
+            self.values[name] = self._clamp(name, self.values[name])
+
+    def _clamp(self, name, value):
+        return max(0, min(value, self.values[f"{name}_max"]))
+
+    def get(self, name):
+        return self.values[name]
+
+    def get_max(self, name):
+        return self.values[f"{name}_max"]
+
+    def set(self, name, value):
+        """
+        Set a vital, kept between 0 and its max.
+
+        Args:
+            name (str): the vital, e.g. "health".
+            value (int): the new value.
+
+        Returns:
+            value (int): the value that was set.
+        """
+        value = self._clamp(name, value)
+        if value != self.values[name]:
+            self.values[name] = value
+            _DIRTY.add(self)
+        return value
+
+    def change(self, name, amount):
+        """
+        Change a vital by amount, returns the new value.
+        """
+        return self.set(name, self.values[name] + amount)
+
+    def set_max(self, name, value):
+        """
+        Set the max of a vital, the vital itself is lowered to fit.
+        """
+        self.values[f"{name}_max"] = max(0, value)
+        self.values[name] = self._clamp(name, self.values[name])
+        _DIRTY.add(self)
+
+    def save(self):
+        """
+        Write the vitals to the character's `vitals` Attribute.
+        """
+        _DIRTY.discard(self)
+        if self.obj.pk:
+            self.obj.attributes.add("vitals", dict(self.values))
+
+
+def flush():
+    """
+    Save every changed vitals handler in one transaction.
+
+    Returns:
+        saved (int): how many handlers were saved.
+    """
+    if not _DIRTY:
+        return 0
+    handlers = list(_DIRTY)
+    with transaction.atomic():
+        for handler in handlers:
+            handler.save()
+    return len(handlers)